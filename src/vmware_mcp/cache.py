@@ -0,0 +1,48 @@
+"""Bounded LRU cache of read-tool results, scoped per VM."""
+
+import os
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Tool results keyed by tool name and arguments.
+
+    Each entry belongs to a scope: a VM's normalized .vmx path, or "" for host-wide reads
+    such as the running-VM or network lists. Invalidating a VM also drops the host-wide
+    entries, since a power or network change shows up there too.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[str, float, object]] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(int(os.getenv("VMWARE_CACHE_SIZE", "256")))
+
+    def get(self, key: tuple, max_age: float) -> tuple[object, float] | None:
+        """``(result, age)`` if an entry at most ``max_age`` seconds old exists."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[1]
+        if age > max_age:
+            return None
+        self._entries.move_to_end(key)
+        return entry[2], age
+
+    def put(self, key: tuple, scope: str, result: object) -> None:
+        self._entries[key] = (scope, time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *scopes: str) -> None:
+        """Drop the entries of ``scopes`` and all host-wide entries."""
+        drop = {"", *scopes}
+        for key in [k for k, (s, _, _) in self._entries.items() if s in drop]:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,23 +1,60 @@
 """VMware Workstation Pro REST API Client."""
 
+import time
 import httpx
 from typing import Any
 
+from .health import get_breaker
+from .profiling import span
+from .tracing import get_tracer
+
 
 class VMwareClient:
     """HTTP client for VMware Workstation Pro REST API."""
 
-    def __init__(self, host: str = "localhost", port: int = 8697, username: str = "", password: str = ""):
+    def __init__(self, host: str = "localhost", port: int = 8697, username: str = "", password: str = "", max_connections: int = 16):
         self.base_url = f"http://{host}:{port}/api"
         self.auth = (username, password) if username else None
+        self.max_connections = max_connections
+        self._http: httpx.AsyncClient | None = None
+
+    def _get_http(self) -> httpx.AsyncClient:
+        # One pooled connection set per client so concurrent calls reuse keep-alive sockets
+        if self._http is None or self._http.is_closed:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            self._http = httpx.AsyncClient(auth=self.auth, verify=False, limits=limits)
+        return self._http
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
     async def _request(self, method: str, path: str, **kwargs) -> Any:
-        async with httpx.AsyncClient(auth=self.auth, verify=False) as client:
-            resp = await client.request(method, f"{self.base_url}{path}", **kwargs)
-            resp.raise_for_status()
-            if resp.content:
+        tracer = get_tracer()
+        if tracer is not None and tracer.replaying:
+            resp = await tracer.replay_http(method, f"{self.base_url}{path}", path)
+        else:
+            breaker = get_breaker("vmrest")
+            breaker.before_call()
+            started = time.monotonic()
+            try:
+                with span("vmrest", request=f"{method} {path}"):
+                    resp = await self._get_http().request(method, f"{self.base_url}{path}", **kwargs)
+            except httpx.TransportError as e:
+                breaker.record_failure(e)
+                if tracer is not None:
+                    tracer.record("vmrest", f"{method} {path}", None, "", str(e), time.monotonic() - started)
+                raise
+            # Any HTTP response, even an error status, means vmrest itself is up
+            breaker.record_success()
+            if tracer is not None:
+                tracer.record("vmrest", f"{method} {path}", resp.status_code, resp.text, "", time.monotonic() - started)
+        resp.raise_for_status()
+        if resp.content:
+            with span("json_decode"):
                 return resp.json()
-            return None
+        return None
 
     # VM Management
     async def list_vms(self) -> list[dict]:
@@ -29,6 +66,9 @@ class VMwareClient:
     async def create_vm(self, vm_id: str, name: str) -> dict:
         return await self._request("POST", f"/vms/{vm_id}", json={"name": name})
 
+    async def register_vm(self, name: str, vmx_path: str) -> dict:
+        return await self._request("POST", "/vms/registration", json={"name": name, "path": vmx_path})
+
     async def delete_vm(self, vm_id: str) -> None:
         await self._request("DELETE", f"/vms/{vm_id}")
 
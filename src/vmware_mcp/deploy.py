@@ -0,0 +1,72 @@
+"""Parallel template deployment, throttled per destination volume."""
+
+import asyncio
+import glob
+import os
+import time
+
+import httpx
+
+from .client import VMwareClient
+from .vmcli import VMCli
+
+_volume_slots: dict[object, asyncio.Semaphore] = {}
+
+
+def volume_of(path: str) -> object:
+    """Identify the storage volume ``path`` lives on (or would be created on)."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return os.path.splitdrive(path)[0]
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+
+async def deploy_many(vmcli: VMCli, client: VMwareClient, template_path: str, dest_path: str, names: list[str], on_registered=None) -> list[dict]:
+    """Deploy one template instance per name under ``dest_path``.
+
+    Deploys to the same volume share a semaphore of ``VMWARE_DEPLOY_PER_VOLUME`` slots
+    (default 2, also across calls) so parallel copies don't saturate one disk. Each
+    deployed VM is registered with vmrest and passed to ``on_registered`` (its vmrest
+    entry, with ``path`` filled in).
+    """
+    per_volume = int(os.getenv("VMWARE_DEPLOY_PER_VOLUME", "2"))
+
+    async def one(name: str) -> dict:
+        dest = os.path.join(dest_path, name)
+        slots = _volume_slots.setdefault(volume_of(dest), asyncio.Semaphore(per_volume))
+        entry = {"name": name, "dest": dest}
+        async with slots:
+            started = time.monotonic()
+            try:
+                await vmcli.template_deploy(template_path, dest, name)
+            except RuntimeError as e:
+                return {**entry, "error": str(e), "seconds": round(time.monotonic() - started, 3)}
+            entry["seconds"] = round(time.monotonic() - started, 3)
+        entry["bytes_written"] = dir_size(dest)
+        vmx_files = glob.glob(os.path.join(dest, "**", "*.vmx"), recursive=True)
+        if vmx_files:
+            entry["vmx"] = vmx_files[0]
+            try:
+                vm = {"path": vmx_files[0], **await client.register_vm(name, vmx_files[0])}
+                entry["vm_id"] = vm["id"]
+                if on_registered is not None:
+                    on_registered(vm)
+            except (RuntimeError, httpx.HTTPError) as e:
+                entry["register_error"] = str(e)
+        return entry
+
+    return list(await asyncio.gather(*(one(n) for n in names)))
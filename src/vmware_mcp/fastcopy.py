@@ -0,0 +1,72 @@
+"""Host-to-guest file copies, through a temporary HGFS share for large files."""
+
+import os
+import shlex
+import shutil
+import tempfile
+import time
+import uuid
+
+from . import guest_helper
+from .vmrun import VMRun
+from .vmx import is_windows_guest, read_vmx, shared_folders_enabled
+
+
+def stage_file(host_path: str) -> str:
+    """Private temp directory holding a hard link to ``host_path``, or "" if the file cannot be linked.
+
+    The directory is created next to the file so the link stays on the same volume; a
+    read-only directory or a file system without hard links (FAT, exFAT, some network
+    shares) yields "" rather than a full copy of the file.
+    """
+    try:
+        share_dir = tempfile.mkdtemp(prefix=".vmware-mcp-", dir=os.path.dirname(host_path))
+    except OSError:
+        return ""
+    try:
+        os.link(host_path, os.path.join(share_dir, os.path.basename(host_path)))
+    except OSError:
+        shutil.rmtree(share_dir, ignore_errors=True)
+        return ""
+    return share_dir
+
+
+async def copy_to_guest(vmrun: VMRun, vmx_path: str, host_path: str, guest_path: str, user: str, password: str, guest_ops, threshold_mb: float | None = None) -> dict:
+    """Copy a host file into the guest, through a temporary HGFS share when it is large.
+
+    Files of at least ``threshold_mb`` (default ``VMWARE_FAST_COPY_THRESHOLD_MB``, 256)
+    are shared read-only with the guest and copied there locally, provided shared folders
+    are enabled for the VM; smaller files go through ``guest_ops`` (the vmrun/vmcli copy).
+    Only a private temp directory holding a hard link to the file is shared, never its own
+    directory; when the file cannot be hard-linked it goes through ``guest_ops`` as well.
+    """
+    if threshold_mb is None:
+        threshold_mb = float(os.getenv("VMWARE_FAST_COPY_THRESHOLD_MB", "256"))
+    size = os.path.getsize(host_path)
+    config = read_vmx(vmx_path)
+    started = time.monotonic()
+    share_dir = ""
+    if size >= threshold_mb * 1024 * 1024 and shared_folders_enabled(config):
+        share_dir = stage_file(os.path.abspath(host_path))
+    if share_dir:
+        method = "hgfs"
+        share = f"vmware-mcp-{uuid.uuid4().hex[:8]}"
+        try:
+            await vmrun.add_shared_folder(vmx_path, share, share_dir)
+            try:
+                await vmrun.set_shared_folder_state(vmx_path, share, share_dir, writable=False)
+                windows = is_windows_guest(config)
+                source = guest_helper.guest_root(share, windows) + ("\\" if windows else "/") + os.path.basename(host_path)
+                if windows:
+                    await vmrun.run_program(vmx_path, r"C:\Windows\System32\cmd.exe", f'/c copy /Y "{source}" "{guest_path}"', user=user, password=password)
+                else:
+                    await vmrun.run_script(vmx_path, "/bin/sh", f"cp {shlex.quote(source)} {shlex.quote(guest_path)}", user=user, password=password)
+            finally:
+                await vmrun.remove_shared_folder(vmx_path, share)
+        finally:
+            shutil.rmtree(share_dir, ignore_errors=True)
+    else:
+        method = "guest_ops"
+        await guest_ops(vmx_path, host_path, guest_path, user, password)
+    seconds = time.monotonic() - started
+    return {"method": method, "bytes": size, "seconds": round(seconds, 3), "throughput_mb_s": round(size / 1048576 / max(seconds, 1e-6), 1)}
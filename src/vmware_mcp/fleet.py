@@ -0,0 +1,77 @@
+"""Fleet-wide snapshot and revert, run concurrently across many VMs."""
+
+import asyncio
+import time
+
+from .vmrun import VMRun
+
+
+async def run_fleet(vmx_paths: dict[str, str], op, concurrency: int, on_done=None) -> dict:
+    """Apply ``op(vmx_path)`` to every VM, at most ``concurrency`` at a time, timing each one.
+
+    ``on_done(vmx_path)`` is called after each VM's operation, whether or not it failed.
+    """
+    slots = asyncio.Semaphore(max(1, concurrency))
+    started = time.monotonic()
+
+    async def one(vm_id: str, path: str) -> dict:
+        async with slots:
+            entry = {"vm_id": vm_id, "vmx": path}
+            vm_started = time.monotonic()
+            try:
+                entry.update(await op(path))
+            except (RuntimeError, TimeoutError) as e:
+                entry["error"] = str(e)
+            finally:
+                if on_done is not None:
+                    on_done(path)
+            entry["seconds"] = round(time.monotonic() - vm_started, 3)
+            return entry
+
+    results = await asyncio.gather(*(one(vm_id, path) for vm_id, path in vmx_paths.items()))
+    return {
+        "results": results,
+        "failed": [r["vm_id"] for r in results if "error" in r],
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+async def wait_for_tools(vmrun: VMRun, vmx_path: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await vmrun.check_tools_state(vmx_path)).strip().lower() == "running":
+                return
+        except RuntimeError:
+            pass
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"VMware Tools not running after {timeout:g}s")
+        await asyncio.sleep(2)
+
+
+async def fleet_snapshot(vmrun: VMRun, vmx_paths: dict[str, str], name: str, concurrency: int = 4, on_done=None) -> dict:
+    async def take(path: str) -> dict:
+        await vmrun.snapshot(path, name)
+        return {"snapshot": name}
+
+    return await run_fleet(vmx_paths, take, concurrency, on_done)
+
+
+async def fleet_revert(vmrun: VMRun, vmx_paths: dict[str, str], name: str, power_on: bool = False,
+                       wait_tools: bool = False, tools_timeout: float = 300.0, gui: bool = False, concurrency: int = 4,
+                       on_done=None) -> dict:
+    """Revert every VM to snapshot ``name``, optionally starting it again and waiting for its Tools."""
+    async def revert(path: str) -> dict:
+        await vmrun.revert_to_snapshot(path, name)
+        entry = {"snapshot": name}
+        # A snapshot taken while powered on may come back running already
+        if power_on and not await vmrun.is_running(path):
+            await vmrun.start(path, gui)
+            entry["started"] = True
+        if wait_tools:
+            tools_started = time.monotonic()
+            await wait_for_tools(vmrun, path, tools_timeout)
+            entry["tools_seconds"] = round(time.monotonic() - tools_started, 3)
+        return entry
+
+    return await run_fleet(vmx_paths, revert, concurrency, on_done)
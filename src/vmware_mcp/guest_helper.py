@@ -0,0 +1,242 @@
+"""Batched guest operations over a shared-folder request/response channel.
+
+The host drops JSON request files into ``<root>/requests`` and a helper process
+running inside the guest executes them and answers in ``<root>/responses``. ``root``
+is an HGFS shared folder, so no vmrun process or guest login is needed per batch.
+Any local directory works as a stand-in for testing.
+
+This file is copied into the guest and run there as a script, so it only uses the
+standard library and must stay importable on older Python versions.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+
+HELPER_NAME = "vmware_mcp_helper.py"
+HEARTBEAT = "helper.json"
+
+
+def _write_json(path: str, data: dict) -> None:
+    # Write-then-rename so the other side never sees a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# === Guest side ===
+def _encode(data: bytes, encoding: str) -> str:
+    if encoding == "base64":
+        return base64.b64encode(data).decode("ascii")
+    return data.decode(encoding, errors="replace")
+
+
+def _decode(text: str, encoding: str) -> bytes:
+    if encoding == "base64":
+        return base64.b64decode(text)
+    return text.encode(encoding)
+
+
+def execute(op: dict) -> dict:
+    """Run a single operation and return its result fields."""
+    kind = op.get("op")
+    path = op.get("path", "")
+    encoding = op.get("encoding", "utf-8")
+    if kind == "read_file":
+        with open(path, "rb") as f:
+            data = f.read(op.get("max_bytes", -1))
+        return {"content": _encode(data, encoding)}
+    if kind == "write_file":
+        with open(path, "ab" if op.get("append") else "wb") as f:
+            f.write(_decode(op.get("content", ""), encoding))
+        return {}
+    if kind == "list_dir":
+        return {"entries": sorted(os.listdir(path))}
+    if kind == "exists":
+        return {"exists": os.path.exists(path), "is_dir": os.path.isdir(path)}
+    if kind == "mkdir":
+        os.makedirs(path, exist_ok=True)
+        return {}
+    if kind == "remove":
+        if os.path.isdir(path) and op.get("recursive"):
+            shutil.rmtree(path)
+        elif os.path.isdir(path):
+            os.rmdir(path)
+        else:
+            os.remove(path)
+        return {}
+    if kind == "rename":
+        os.replace(op["src"], op["dst"])
+        return {}
+    if kind == "run":
+        proc = subprocess.run(
+            op["argv"],
+            cwd=op.get("cwd") or None,
+            env=dict(os.environ, **op.get("env", {})),
+            input=op.get("input", "").encode(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=op.get("timeout"),
+        )
+        return {
+            "exit_code": proc.returncode,
+            "stdout": proc.stdout.decode("utf-8", errors="replace"),
+            "stderr": proc.stderr.decode("utf-8", errors="replace"),
+        }
+    if kind == "env":
+        names = op.get("names")
+        return {"env": {k: v for k, v in os.environ.items() if not names or k in names}}
+    raise ValueError("unknown op: %s" % kind)
+
+
+def execute_batch(ops: list, stop_on_error: bool = False) -> list:
+    results = []
+    for op in ops:
+        started = time.monotonic()
+        try:
+            result = dict(execute(op), ok=True)
+        except Exception as e:
+            result = {"ok": False, "error": "%s: %s" % (type(e).__name__, e)}
+        result["seconds"] = round(time.monotonic() - started, 4)
+        results.append(result)
+        if stop_on_error and not result["ok"]:
+            break
+    return results
+
+
+def handle_pending(root: str) -> bool:
+    """Answer every request currently queued under ``root``. Returns False once asked to stop."""
+    requests_dir = os.path.join(root, "requests")
+    keep_running = True
+    for name in sorted(os.listdir(requests_dir)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(requests_dir, name)
+        try:
+            request = _read_json(path)
+        except (OSError, ValueError):
+            continue
+        ops = request.get("ops", [])
+        results = execute_batch([op for op in ops if op.get("op") != "stop"], request.get("stop_on_error", False))
+        _write_json(os.path.join(root, "responses", name), {"id": request.get("id"), "results": results})
+        os.remove(path)
+        if any(op.get("op") == "stop" for op in ops):
+            keep_running = False
+    return keep_running
+
+
+def serve(root: str, poll_interval: float = 0.1) -> None:
+    """Helper main loop, run inside the guest."""
+    for sub in ("requests", "responses"):
+        os.makedirs(os.path.join(root, sub), exist_ok=True)
+    heartbeat = {"pid": os.getpid(), "python": sys.version.split()[0], "platform": sys.platform}
+    running = True
+    while running:
+        _write_json(os.path.join(root, HEARTBEAT), dict(heartbeat, time=time.time()))
+        running = handle_pending(root)
+        if running:
+            time.sleep(poll_interval)
+    os.remove(os.path.join(root, HEARTBEAT))
+
+
+# === Host side ===
+class HelperChannel:
+    """Host end of the channel: submits batches and waits for the guest's answers."""
+
+    def __init__(self, root: str, poll_interval: float = 0.05):
+        self.root = root
+        self.poll_interval = poll_interval
+
+    def heartbeat(self) -> dict | None:
+        try:
+            return _read_json(os.path.join(self.root, HEARTBEAT))
+        except (OSError, ValueError):
+            return None
+
+    def alive(self, max_age: float = 10.0) -> bool:
+        beat = self.heartbeat()
+        return beat is not None and time.time() - beat.get("time", 0) <= max_age
+
+    async def wait_alive(self, timeout: float = 30.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while not self.alive():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"guest helper did not start within {timeout}s")
+            await asyncio.sleep(self.poll_interval * 4)
+        return self.heartbeat()
+
+    async def submit(self, ops: list[dict], timeout: float = 60.0, stop_on_error: bool = False) -> list[dict]:
+        for sub in ("requests", "responses"):
+            os.makedirs(os.path.join(self.root, sub), exist_ok=True)
+        request_id = uuid.uuid4().hex
+        name = f"{request_id}.json"
+        response_path = os.path.join(self.root, "responses", name)
+        _write_json(os.path.join(self.root, "requests", name), {"id": request_id, "ops": ops, "stop_on_error": stop_on_error})
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(response_path):
+            if time.monotonic() > deadline:
+                try:
+                    os.remove(os.path.join(self.root, "requests", name))
+                except OSError:
+                    pass
+                raise TimeoutError(f"guest helper did not answer within {timeout}s")
+            await asyncio.sleep(self.poll_interval)
+        response = _read_json(response_path)
+        os.remove(response_path)
+        return response["results"]
+
+
+def guest_root(share_name: str, windows: bool) -> str:
+    """Path under which the guest sees the HGFS share ``share_name``."""
+    if windows:
+        return "\\\\vmware-host\\Shared Folders\\" + share_name
+    return "/mnt/hgfs/" + share_name
+
+
+def bootstrap_script(root: str, windows: bool) -> str:
+    """Python snippet that starts the helper from the shared folder inside the guest."""
+    script = root + ("\\" if windows else "/") + HELPER_NAME
+    return f"import runpy, sys\nsys.argv = [{script!r}, {root!r}]\nrunpy.run_path({script!r}, run_name='__main__')\n"
+
+
+async def launch(vmrun, vmx_path: str, host_dir: str, share: str, python: str, windows: bool, user: str, password: str) -> tuple[HelperChannel, dict]:
+    """Share ``host_dir`` with the guest through ``vmrun`` and start the helper from it.
+
+    ``python`` defaults to /usr/bin/python3 on Linux guests; Windows guests have no standard
+    interpreter path, so it is required there.
+    """
+    if not python:
+        if windows:
+            raise ValueError("python (full path of the guest interpreter) is required for Windows guests")
+        python = "/usr/bin/python3"
+    os.makedirs(host_dir, exist_ok=True)
+    shutil.copyfile(os.path.abspath(__file__), os.path.join(host_dir, HELPER_NAME))
+    await vmrun.enable_shared_folders(vmx_path)
+    try:
+        await vmrun.add_shared_folder(vmx_path, share, host_dir)
+    except RuntimeError:
+        # Share already exists, just point it at host_dir
+        await vmrun.set_shared_folder_state(vmx_path, share, host_dir, True)
+    root = guest_root(share, windows)
+    channel = HelperChannel(host_dir)
+    await vmrun.run_script(vmx_path, python, bootstrap_script(root, windows), no_wait=True, user=user, password=password)
+    heartbeat = await channel.wait_alive()
+    return channel, {"host_dir": host_dir, "guest_root": root, **heartbeat}
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.abspath(__file__)))
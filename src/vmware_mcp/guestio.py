@@ -0,0 +1,230 @@
+"""Inline guest file access and command execution through managed temp files."""
+
+import asyncio
+import base64
+import os
+import re
+import shlex
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+from .vmrun import VMRun
+
+_TAIL_BLOCK = 8192
+_CMD_META = re.compile(r'([()!^"<>&|])')
+_SAFE_ARG = re.compile(r"^[A-Za-z0-9_.:+\\/-]+$")
+_PROCESS = re.compile(r"^pid=(\d+),.*?\bcmd=(.*)$", re.M)
+
+
+def max_file_bytes() -> int:
+    return int(os.getenv("VMWARE_GUEST_FILE_MAX_BYTES", str(1024 * 1024)))
+
+
+def _encode(data: bytes, encoding: str) -> str:
+    return base64.b64encode(data).decode("ascii") if encoding == "base64" else data.decode(encoding, errors="replace")
+
+
+def _read_tail(f, size: int, lines: int, limit: int) -> tuple[int, bytes, bool]:
+    """Offset and bytes of the last ``lines`` lines, looking back at most ``limit`` bytes, and whether that cut them short."""
+    if lines <= 0:
+        return size, b"", False
+    floor = max(0, size - limit)
+    start, data = size, b""
+    # A trailing newline ends the last line rather than starting an empty one
+    while start > floor and data.rstrip(b"\n").count(b"\n") < lines:
+        block_start = max(floor, start - _TAIL_BLOCK)
+        f.seek(block_start)
+        data = f.read(start - block_start) + data
+        start = block_start
+    parts = data.rstrip(b"\n").split(b"\n")
+    if len(parts) > lines:
+        cut = sum(len(p) + 1 for p in parts[:len(parts) - lines])
+        return start + cut, data[cut:], False
+    return start, data, start > 0
+
+
+async def read_guest_file(vmrun: VMRun, vmx_path: str, guest_path: str, user: str = "", password: str = "",
+                          offset: int = 0, length: int | None = None, tail_lines: int | None = None,
+                          encoding: str = "utf-8", max_bytes: int | None = None) -> dict:
+    """Copy a guest file to a private temp dir and return (part of) it inline.
+
+    Returns at most ``max_bytes`` (default ``VMWARE_GUEST_FILE_MAX_BYTES``, 1 MiB): either
+    ``length`` bytes from ``offset`` or the last ``tail_lines`` lines. ``truncated`` tells
+    whether the cap cut the requested part short.
+    """
+    limit = max_bytes or max_file_bytes()
+    with tempfile.TemporaryDirectory(prefix="vmware-mcp-") as tmp:
+        host_path = os.path.join(tmp, "guest-file")
+        await vmrun.copy_from_guest(vmx_path, guest_path, host_path, user, password)
+        size = os.path.getsize(host_path)
+        with open(host_path, "rb") as f:
+            if tail_lines is not None:
+                start, data, truncated = _read_tail(f, size, tail_lines, limit)
+            else:
+                start = min(offset, size)
+                wanted = size - start if length is None else min(length, size - start)
+                f.seek(start)
+                data = f.read(min(wanted, limit))
+                truncated = len(data) < wanted
+    return {
+        "path": guest_path, "size": size, "offset": start, "bytes": len(data),
+        "truncated": truncated, "encoding": encoding, "content": _encode(data, encoding),
+    }
+
+
+async def write_guest_file(vmrun: VMRun, vmx_path: str, guest_path: str, content: str, user: str = "", password: str = "",
+                           encoding: str = "utf-8", max_bytes: int | None = None) -> dict:
+    """Write ``content`` (text, or base64 with ``encoding="base64"``) to a guest file."""
+    data = base64.b64decode(content) if encoding == "base64" else content.encode(encoding)
+    limit = max_bytes or max_file_bytes()
+    if len(data) > limit:
+        raise ValueError(f"content is {len(data)} bytes, over the {limit} byte limit")
+    with tempfile.TemporaryDirectory(prefix="vmware-mcp-") as tmp:
+        host_path = os.path.join(tmp, "guest-file")
+        with open(host_path, "wb") as f:
+            f.write(data)
+        await vmrun.copy_to_guest(vmx_path, host_path, guest_path, user, password)
+    return {"path": guest_path, "bytes": len(data)}
+
+
+def _msvcrt_quote(arg: str) -> str:
+    """``arg`` in double quotes, escaped so the C runtime's argv parsing gets it back unchanged."""
+    quoted, backslashes = '"', 0
+    for c in arg:
+        if c == "\\":
+            backslashes += 1
+            continue
+        quoted += "\\" * (backslashes * 2 + 1 if c == '"' else backslashes) + c
+        backslashes = 0
+    return quoted + "\\" * (backslashes * 2) + '"'
+
+
+def cmd_line(argv: list[str]) -> str:
+    """``argv`` as one batch-file command line that reaches the program literally.
+
+    Every argument containing anything but path characters is quoted for the C runtime
+    (bare ones keep cmd built-ins such as ``dir /b`` working). Every cmd metacharacter,
+    quotes included, is then escaped with ``^``, so cmd never enters a quoted section
+    in which an embedded quote could expose ``&`` or ``|``; ``%`` is doubled since batch
+    files expand ``%VAR%`` before escapes are seen.
+    """
+    return _cmd_escape(" ".join(arg if _SAFE_ARG.match(arg) else _msvcrt_quote(arg) for arg in argv))
+
+
+def _cmd_escape(text: str) -> str:
+    return _CMD_META.sub(r"^\1", text).replace("%", "%%")
+
+
+def exec_script(argv: list[str], cwd: str, out: str, err: str, rc: str, pid: str, windows: bool) -> str:
+    """Wrapper script running ``argv`` with output redirected to guest files and the exit code written last.
+
+    On Linux the command runs in its own session (via ``setsid`` where the guest has it)
+    and the wrapper's PID and the command's PID are written to ``pid`` first, so a
+    timed-out command can be killed with its children; Windows wrappers are found by their
+    script path.
+    """
+    if windows:
+        line = cmd_line(argv)
+        if cwd:
+            line = f"cd /d {_cmd_escape(_msvcrt_quote(cwd))} && {line}"
+        return "\r\n".join([
+            "@echo off",
+            f'({line}) > "{out}" 2> "{err}"',
+            # Redirection first: "echo 1> file" would redirect handle 1 instead of writing "1"
+            f'> "{rc}.tmp" echo %ERRORLEVEL%',
+            f'move /y "{rc}.tmp" "{rc}" > nul',
+            "",
+        ])
+    # exec, so the background PID is the command itself, leading its own process group
+    line = "exec $setsid " + shlex.join(argv)
+    if cwd:
+        line = f"cd {shlex.quote(cwd)} && {line}"
+    return "\n".join([
+        "setsid=$(command -v setsid)",
+        f"({line}) > {shlex.quote(out)} 2> {shlex.quote(err)} &",
+        f'echo "$$ $!" > {shlex.quote(pid)}',
+        "wait $!",
+        f"echo $? > {shlex.quote(rc)}.tmp",
+        f"mv -f {shlex.quote(rc)}.tmp {shlex.quote(rc)}",
+        "",
+    ])
+
+
+async def kill_guest_command(vmrun: VMRun, vmx_path: str, script: str, pid: str, windows: bool, user: str = "", password: str = "") -> bool:
+    """Kill a wrapper started by ``exec_in_guest`` together with its command; False if neither could be killed."""
+    if windows:
+        pids = [int(m.group(1)) for m in _PROCESS.finditer(await vmrun.list_processes(vmx_path, user, password))
+                if script.lower() in m.group(2).lower()]
+        for wrapper in pids:
+            # /T takes the command's whole process tree down with the wrapper
+            await vmrun.run_program(vmx_path, r"C:\Windows\System32\taskkill.exe", f"/F /T /PID {wrapper}", user=user, password=password)
+        return bool(pids)
+    try:
+        wrapper, command = (int(p) for p in (await read_guest_file(vmrun, vmx_path, pid, user, password))["content"].split())
+        # The wrapper first, so it cannot write the exit-code file once its command dies; then
+        # the command's process group, or just the command when the guest had no setsid
+        await vmrun.run_script(
+            vmx_path, "/bin/sh", f"kill -KILL {wrapper} 2> /dev/null; kill -KILL -{command} 2> /dev/null || kill -KILL {command}", user=user, password=password,
+        )
+    except (RuntimeError, ValueError):
+        return False
+    return True
+
+
+async def exec_in_guest(vmrun: VMRun, vmx_path: str, argv: list[str], windows: bool, user: str = "", password: str = "",
+                        cwd: str = "", timeout: float = 300.0, max_bytes: int | None = None,
+                        on_output: Callable[[float, str], Awaitable[None]] | None = None) -> dict:
+    """Run ``argv`` in the guest and return its stdout, stderr and exit code.
+
+    A wrapper script redirects the output to guest temp files next to a vmrun-created temp
+    file, and is started without waiting; completion is detected by the exit-code file
+    appearing. While polling, new stdout is passed to ``on_output(elapsed, text)``. On
+    timeout the wrapper and its command are killed before the output is collected. All the
+    guest temp files are deleted afterwards, also on timeout or error.
+    """
+    base = (await vmrun.create_temp_file(vmx_path, user, password)).strip()
+    script = base + (".cmd" if windows else ".sh")
+    out, err, rc, pid = base + ".out", base + ".err", base + ".rc", base + ".pid"
+    started = time.monotonic()
+    exit_code = None
+    try:
+        await write_guest_file(vmrun, vmx_path, script, exec_script(argv, cwd, out, err, rc, pid, windows), user, password)
+        if windows:
+            await vmrun.run_program(vmx_path, r"C:\Windows\System32\cmd.exe", f'/c "{script}"', no_wait=True, user=user, password=password)
+        else:
+            await vmrun.run_program(vmx_path, "/bin/sh", script, no_wait=True, user=user, password=password)
+
+        delay, streamed = 0.25, 0
+        while time.monotonic() - started < timeout:
+            try:
+                exit_code = int((await read_guest_file(vmrun, vmx_path, rc, user, password))["content"].strip())
+                break
+            except (RuntimeError, ValueError):
+                pass
+            if on_output is not None:
+                try:
+                    chunk = await read_guest_file(vmrun, vmx_path, out, user, password, offset=streamed, max_bytes=max_bytes)
+                except RuntimeError:
+                    chunk = None
+                if chunk and chunk["bytes"]:
+                    streamed += chunk["bytes"]
+                    await on_output(time.monotonic() - started, chunk["content"])
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+        result = {"exit_code": exit_code, "timed_out": exit_code is None, "seconds": round(time.monotonic() - started, 3)}
+        if exit_code is None:
+            result["killed"] = await kill_guest_command(vmrun, vmx_path, script, pid, windows, user, password)
+        for name, path in (("stdout", out), ("stderr", err)):
+            try:
+                data = await read_guest_file(vmrun, vmx_path, path, user, password, max_bytes=max_bytes)
+                result[name], result[f"{name}_truncated"] = data["content"], data["truncated"]
+            except RuntimeError:
+                result[name], result[f"{name}_truncated"] = "", False
+        return result
+    finally:
+        await asyncio.gather(
+            *(vmrun.delete_file(vmx_path, path, user, password) for path in (base, script, out, err, rc, *(() if windows else (pid,)))),
+            return_exceptions=True,
+        )
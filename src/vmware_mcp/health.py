@@ -0,0 +1,74 @@
+"""Backend health tracking with circuit breakers."""
+
+import os
+import time
+
+
+class BackendUnavailable(RuntimeError):
+    """Raised instead of calling a backend whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Fails calls fast after repeated connection failures to one backend.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls raise
+    ``BackendUnavailable`` immediately. Once ``reset_timeout`` seconds have passed the
+    circuit goes half-open and lets a single probe through: success closes it again,
+    failure re-opens it for another ``reset_timeout``.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.last_error = ""
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+
+    def before_call(self) -> None:
+        now = time.monotonic()
+        if self.state == "open":
+            remaining = self.reset_timeout - (now - self._opened_at)
+            if remaining > 0:
+                raise BackendUnavailable(f"{self.name} is unavailable ({self.last_error}); next retry in {remaining:.1f}s")
+            self.state = "half_open"
+            self._probe_at = now
+        elif self.state == "half_open":
+            # Only one probe at a time; a probe that never reported back is replaced after reset_timeout
+            if now - self._probe_at < self.reset_timeout:
+                raise BackendUnavailable(f"{self.name} is unavailable ({self.last_error}); probe in progress")
+            self._probe_at = now
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self, error: BaseException) -> None:
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}".rstrip(": ")
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "last_error": self.last_error}
+
+
+BACKENDS = ("vmrest", "vmrun", "vmcli")
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv("VMWARE_BREAKER_THRESHOLD", "3")),
+            reset_timeout=float(os.getenv("VMWARE_BREAKER_RESET", "30")),
+        )
+    return _breakers[name]
+
+
+def backend_health() -> dict:
+    return {name: get_breaker(name).status() for name in BACKENDS}
@@ -0,0 +1,57 @@
+"""One-pass fleet snapshot of settings, power, IP and NICs over vmrest."""
+
+import asyncio
+
+from .client import VMwareClient
+
+
+def format_table(columns: list[str], rows: list[list[str]]) -> str:
+    """Render rows as a compact, column-aligned text table."""
+    widths = [max(len(str(r[i])) for r in [columns, *rows]) for i in range(len(columns))]
+    lines = ["  ".join(str(v).ljust(w) for v, w in zip(r, widths)).rstrip() for r in [columns, *rows]]
+    return "\n".join(lines)
+
+
+async def inventory(client: VMwareClient, vms: list[dict], concurrency: int = 8, timeout: float = 10.0) -> str:
+    """Fetch settings, power, IP and NICs for every VM in ``vms`` (vmrest entries) in one pass.
+
+    At most ``concurrency`` VMs are queried at once; each VM's four REST calls run
+    concurrently and any still pending after ``timeout`` seconds are marked "timeout".
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(vm: dict) -> list[str]:
+        vm_id = vm["id"]
+        async with sem:
+            calls = {
+                "settings": asyncio.ensure_future(client.get_vm(vm_id)),
+                "power": asyncio.ensure_future(client.get_power_state(vm_id)),
+                "ip": asyncio.ensure_future(client.get_vm_ip(vm_id)),
+                "nics": asyncio.ensure_future(client.list_nics(vm_id)),
+            }
+            await asyncio.wait(calls.values(), timeout=timeout)
+
+        def field(key: str, render) -> str:
+            task = calls[key]
+            if not task.done():
+                task.cancel()
+                return "timeout"
+            if task.exception() is not None:
+                return "-" if key == "ip" else "error"
+            return render(task.result() or {})
+
+        def nics(r: dict) -> str:
+            return ",".join(f"{n.get('index')}:{n.get('type')}/{n.get('vmnet', '')}" for n in r.get("nics", [])) or "-"
+
+        return [
+            vm_id,
+            vm["path"],
+            field("settings", lambda r: str(r.get("cpu", {}).get("processors", "-"))),
+            field("settings", lambda r: str(r.get("memory", "-"))),
+            field("power", lambda r: r.get("power_state", "-")),
+            field("ip", lambda r: r.get("ip", "-")),
+            field("nics", nics),
+        ]
+
+    rows = await asyncio.gather(*(one(vm) for vm in vms))
+    return format_table(["id", "path", "cpu", "memory", "power", "ip", "nics"], rows)
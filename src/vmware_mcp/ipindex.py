@@ -0,0 +1,146 @@
+"""Host-wide MAC-to-IP index built from VMware DHCP leases and vmrest mactoip data."""
+
+import asyncio
+import glob
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from .client import VMwareClient
+from .vmrun import VMRun
+from .vmx import read_vmx, vmx_nics
+
+_LEASE = re.compile(r"lease\s+([\d.]+)\s*\{(.*?)\}", re.S)
+_MAC = re.compile(r"hardware\s+ethernet\s+([0-9a-fA-F:]+)\s*;")
+_ENDS = re.compile(r"ends\s+\d+\s+(\d{4}/\d{2}/\d{2}\s+\d{2}:\d{2}:\d{2})\s*;")
+_VMNET = re.compile(r"(vmnet\d+)", re.I)
+
+
+def lease_files() -> list[str]:
+    """DHCP lease files of the VMware DHCP service (override with ``VMWARE_DHCP_LEASES``)."""
+    if patterns := os.getenv("VMWARE_DHCP_LEASES"):
+        pattern_list = patterns.split(os.pathsep)
+    elif os.name == "nt":
+        pattern_list = [os.path.join(os.getenv("PROGRAMDATA", r"C:\ProgramData"), "VMware", "vmnetdhcp.leases")]
+    else:
+        pattern_list = ["/etc/vmware/vmnet*/dhcpd/dhcpd.leases"]
+    return sorted(f for p in pattern_list for f in glob.glob(p))
+
+
+def parse_leases(text: str) -> dict[str, str]:
+    """MAC -> IP of the unexpired leases in an ISC dhcpd leases file; later entries win."""
+    now = datetime.now(timezone.utc).strftime("%Y/%m/%d %H:%M:%S")
+    index = {}
+    for m in _LEASE.finditer(text):
+        body = m.group(2)
+        mac = _MAC.search(body)
+        ends = _ENDS.search(body)
+        if mac and (ends is None or ends.group(1) >= now):
+            index[mac.group(1).lower()] = m.group(1)
+    return index
+
+
+class IPIndex:
+    """Cached ``{vmnet: {mac: ip}}`` index.
+
+    Rebuilt when older than ``ttl`` seconds or when a lease file changed. Leases from
+    the shared Windows lease file have no vmnet and are kept under "".
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._index: dict[str, dict[str, str]] = {}
+        self._built = 0.0
+        self._mtimes: dict[str, float] = {}
+
+    def _lease_mtimes(self) -> dict[str, float]:
+        mtimes = {}
+        for path in lease_files():
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                pass
+        return mtimes
+
+    async def refresh(self, client: VMwareClient, force: bool = False) -> dict[str, dict[str, str]]:
+        mtimes = self._lease_mtimes()
+        if not force and self._index and time.monotonic() - self._built < self.ttl and mtimes == self._mtimes:
+            return self._index
+
+        index: dict[str, dict[str, str]] = {}
+        for path in mtimes:
+            m = _VMNET.search(path)
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    index.setdefault(m.group(1).lower() if m else "", {}).update(parse_leases(f.read()))
+            except OSError:
+                pass
+
+        # Static MAC-to-IP reservations from vmrest override leases
+        try:
+            networks = await client.list_networks() or {}
+            vmnets = [n["name"] for n in (networks.get("vmnets", []) if isinstance(networks, dict) else networks)]
+            mappings = await asyncio.gather(*(client.get_mac_to_ips(v) for v in vmnets), return_exceptions=True)
+            for vmnet, result in zip(vmnets, mappings):
+                if isinstance(result, dict):
+                    for entry in result.get("mactoips", []):
+                        index.setdefault(vmnet.lower(), {})[entry["mac"].lower()] = entry["ip"]
+        except (RuntimeError, httpx.HTTPError):
+            pass
+
+        self._index, self._mtimes, self._built = index, mtimes, time.monotonic()
+        return index
+
+    def lookup(self, mac: str, vmnet: str = "") -> str:
+        mac = mac.lower()
+        if ip := self._index.get(vmnet, {}).get(mac):
+            return ip
+        for entries in self._index.values():
+            if mac in entries:
+                return entries[mac]
+        return ""
+
+
+async def lookup_ips(index: IPIndex, client: VMwareClient, vmrun: VMRun, paths: dict[str, str], rest_ids: set[str], fallback: bool = True) -> dict:
+    """IPs of the VMs in ``paths`` (key -> .vmx path) from the MAC-to-IP ``index``.
+
+    Each VM's NIC MACs come from its .vmx; only VMs with no indexed MAC fall back to
+    vmrest (when the key is one of ``rest_ids``) or vmrun getGuestIPAddress.
+    """
+    await index.refresh(client)
+
+    results: dict[str, dict] = {}
+    misses = []
+    for key, path in paths.items():
+        try:
+            nics = vmx_nics(read_vmx(path))
+        except OSError:
+            nics = []
+        for nic in nics:
+            if nic["present"] and nic["mac"] and (ip := index.lookup(nic["mac"], nic["vmnet"])):
+                results[key] = {"ip": ip, "mac": nic["mac"], "vmnet": nic["vmnet"], "source": "index"}
+                break
+        else:
+            misses.append(key)
+
+    sem = asyncio.Semaphore(4)
+
+    async def resolve(key: str) -> None:
+        async with sem:
+            try:
+                if key in rest_ids:
+                    ip, source = (await client.get_vm_ip(key)).get("ip", ""), "vmrest"
+                else:
+                    ip, source = await vmrun.get_guest_ip(paths[key]), "vmrun"
+                results[key] = {"ip": ip, "source": source}
+            except (RuntimeError, httpx.HTTPError) as e:
+                results[key] = {"ip": None, "source": None, "error": str(e)}
+
+    if fallback:
+        await asyncio.gather(*(resolve(k) for k in misses))
+    else:
+        results.update({k: {"ip": None, "source": None} for k in misses})
+    return results
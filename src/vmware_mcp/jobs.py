@@ -0,0 +1,108 @@
+"""Background job registry for long-running operations."""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Coroutine
+
+
+@dataclass
+class Job:
+    id: str
+    tool: str
+    status: str = "running"
+    started: float = field(default_factory=time.time)
+    finished: float | None = None
+    result: Any = None
+    error: str = ""
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "seconds": round(self.elapsed, 3),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRegistry:
+    """Runs coroutines as tracked background tasks.
+
+    Running jobs are always kept; of the finished ones only the newest
+    ``max_finished`` are retained.
+    """
+
+    def __init__(self, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "JobRegistry":
+        return cls(max_finished=int(os.getenv("VMWARE_JOB_RETENTION", "100")))
+
+    def start(self, tool: str, coro: Coroutine) -> Job:
+        job = Job(id=uuid.uuid4().hex[:12], tool=tool)
+        job.task = asyncio.create_task(coro)
+        job.task.add_done_callback(lambda task: self._finish(job, task))
+        self._jobs[job.id] = job
+        return job
+
+    def _finish(self, job: Job, task: asyncio.Task) -> None:
+        job.finished = time.time()
+        if task.cancelled():
+            job.status = "cancelled"
+        elif task.exception() is not None:
+            job.status = "failed"
+            job.error = str(task.exception())
+        else:
+            job.status = "succeeded"
+            job.result = task.result()
+        finished = [j for j in self._jobs.values() if j.finished is not None]
+        for old in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[old.id]
+
+    def get(self, job_id: str) -> Job:
+        if job_id not in self._jobs:
+            raise RuntimeError(f"Unknown or expired job: {job_id}")
+        return self._jobs[job_id]
+
+    def list(self) -> list[Job]:
+        return list(self._jobs.values())
+
+    async def wait(
+        self,
+        job_id: str,
+        timeout: float | None = None,
+        on_tick: Callable[[float], Awaitable[None]] | None = None,
+        interval: float = 1.0,
+    ) -> Job:
+        """Wait for a job to finish, calling ``on_tick(elapsed)`` every ``interval`` seconds.
+
+        Returns the job, which is still running if ``timeout`` expired first.
+        """
+        job = self.get(job_id)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not job.task.done():
+            step = interval if deadline is None else min(interval, deadline - time.monotonic())
+            if step <= 0:
+                break
+            await asyncio.wait({job.task}, timeout=step)
+            if on_tick is not None and not job.task.done():
+                await on_tick(job.elapsed)
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        job.task.cancel()
+        return job
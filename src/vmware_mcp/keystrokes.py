@@ -0,0 +1,133 @@
+"""Chunked, paced and per-VM serialized keystroke delivery."""
+
+import asyncio
+import os
+import re
+import time
+from typing import Awaitable, Callable
+
+from .vmx import norm_path
+
+# {{ and }} are literal braces; {NAME} is a special key, e.g. {ENTER}, {F5} or {CTRL+ALT+DEL}
+_TOKEN = re.compile(r"\{\{|\}\}|\{([A-Za-z0-9]+(?:\+[A-Za-z0-9]+)*)\}")
+_MODIFIERS = {"CTRL", "ALT", "SHIFT", "WIN"}
+SPECIAL_KEYS = {
+    "ENTER", "TAB", "ESC", "BACKSPACE", "DELETE", "DEL", "SPACE", "INSERT", "HOME", "END", "PGUP", "PGDN",
+    "UP", "DOWN", "LEFT", "RIGHT", *(f"F{i}" for i in range(1, 13)),
+}
+# typeKeystrokesInGuest only types characters, so only keys with a character equivalent work there
+_VMRUN_KEYS = {"ENTER": "\n", "TAB": "\t", "SPACE": " "}
+# vmcli sendKeySequence names special keys in braces too; only aliases need renaming
+_VMCLI_KEYS = {"DEL": "DELETE"}
+
+
+def _is_key(name: str) -> bool:
+    *mods, key = name.upper().split("+")
+    return all(m in _MODIFIERS for m in mods) and (key in SPECIAL_KEYS or (bool(mods) and len(key) == 1))
+
+
+def parse(text: str) -> list[tuple[str, str | None]]:
+    """Split ``text`` into ``(raw, key)`` tokens; ``key`` is the upper-cased key name or None for plain text."""
+    tokens: list[tuple[str, str | None]] = []
+    pos = 0
+    for m in _TOKEN.finditer(text):
+        if m.group(1) and not _is_key(m.group(1)):
+            continue
+        if m.start() > pos:
+            tokens.append((text[pos:m.start()], None))
+        if m.group(1):
+            tokens.append((m.group(0), m.group(1).upper()))
+        else:
+            tokens.append((m.group(0)[0], None))
+        pos = m.end()
+    if pos < len(text):
+        tokens.append((text[pos:], None))
+    return tokens
+
+
+def render_vmrun(raw: str, key: str | None) -> str:
+    if key is None:
+        return raw
+    if key not in _VMRUN_KEYS:
+        raise ValueError(f"vmrun cannot type {{{key}}}; use mks_send_key for special keys")
+    return _VMRUN_KEYS[key]
+
+
+def render_vmcli(raw: str, key: str | None) -> str:
+    """Text for vmcli MKS sendKeySequence: special keys as ``{NAME}``, literal braces doubled."""
+    if key is None:
+        return raw.replace("{", "{{").replace("}", "}}")
+    return "{" + "+".join(_VMCLI_KEYS.get(part, part) for part in key.split("+")) + "}"
+
+
+def chunk(tokens: list[tuple[str, str | None]], size: int, render: Callable[[str, str | None], str]) -> list[str]:
+    """Pack rendered tokens into chunks of at most ``size`` characters, never splitting a special key.
+
+    Plain text is rendered a character at a time, so an escape sequence such as vmcli's
+    ``{{`` never straddles two chunks.
+    """
+    chunks: list[str] = []
+    current = ""
+    for raw, key in tokens:
+        for piece in [render(raw, key)] if key is not None else (render(c, None) for c in raw):
+            if current and len(current) + len(piece) > size:
+                chunks.append(current)
+                current = ""
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class KeystrokePipeline:
+    """Delivers arbitrarily long keystroke input to a VM in paced chunks.
+
+    Each chunk covers about two seconds of typing at ``cps`` characters per second
+    (capped at ``max_chunk`` to stay well below argv limits), which amortizes one
+    process spawn over many keys. Jobs for the same VM queue behind each other, so
+    concurrent typers never interleave, and delivery never runs ahead of ``cps``.
+    """
+
+    def __init__(self, cps: float = 50.0, max_chunk: int = 1024):
+        self.cps = cps
+        self.max_chunk = max_chunk
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @classmethod
+    def from_env(cls) -> "KeystrokePipeline":
+        return cls(
+            cps=float(os.getenv("VMWARE_KEYS_CPS", "50")),
+            max_chunk=int(os.getenv("VMWARE_KEYS_MAX_CHUNK", "1024")),
+        )
+
+    def chunk_size(self, cps: float) -> int:
+        return min(self.max_chunk, max(16, int(cps * 2)))
+
+    async def send(
+        self,
+        vmx_path: str,
+        text: str,
+        deliver: Callable[[str], Awaitable[object]],
+        render: Callable[[str, str | None], str] = render_vmcli,
+        cps: float | None = None,
+    ) -> dict:
+        cps = cps or self.cps
+        chunks = chunk(parse(text), self.chunk_size(cps), render)
+        queued = time.monotonic()
+        async with self._locks.setdefault(norm_path(vmx_path), asyncio.Lock()):
+            started = time.monotonic()
+            sent = 0
+            for i, piece in enumerate(chunks):
+                await deliver(piece)
+                sent += len(piece)
+                ahead = sent / cps - (time.monotonic() - started)
+                if ahead > 0 and i < len(chunks) - 1:
+                    await asyncio.sleep(ahead)
+            seconds = time.monotonic() - started
+        return {
+            "chars": sent,
+            "chunks": len(chunks),
+            "seconds": round(seconds, 3),
+            "queued_seconds": round(started - queued, 3),
+            "chars_per_second": round(sent / seconds, 1) if seconds else None,
+        }
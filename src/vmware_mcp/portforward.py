@@ -0,0 +1,51 @@
+"""Convergence of a vmnet's port forwarding rules over vmrest."""
+
+import asyncio
+
+import httpx
+
+from .client import VMwareClient
+
+
+async def sync_portforwards(client: VMwareClient, vmnet: str, rules: list[dict], prune: bool = True, dry_run: bool = False, concurrency: int = 8) -> dict:
+    """Converge the port forwards of ``vmnet`` to ``rules`` with as few REST calls as possible."""
+    current_raw = await client.get_portforwards(vmnet) or {}
+    if isinstance(current_raw, dict):
+        current_raw = current_raw.get("port_forwardings") or []
+    current = {
+        (r["protocol"].lower(), int(r["port"])): {"guestIp": r.get("guest", {}).get("ip", ""), "guestPort": int(r.get("guest", {}).get("port", 0)), "desc": r.get("desc", "")}
+        for r in current_raw
+    }
+    desired = {
+        (r["protocol"].lower(), int(r["port"])): {"guestIp": r["guest_ip"], "guestPort": int(r["guest_port"]), "desc": r.get("description", "")}
+        for r in rules
+    }
+    changes = {"added": [], "updated": [], "deleted": []}
+    for key, config in desired.items():
+        if key not in current:
+            changes["added"].append((key, config))
+        elif current[key] != config:
+            changes["updated"].append((key, config))
+    if prune:
+        changes["deleted"] = [(key, None) for key in current if key not in desired]
+    unchanged = len(desired) - len(changes["added"]) - len(changes["updated"])
+
+    report: dict = {kind: [f"{proto}/{port}" for (proto, port), _ in items] for kind, items in changes.items()}
+    report.update(unchanged=unchanged, dry_run=dry_run, errors=[])
+    if dry_run:
+        return report
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def apply(key: tuple[str, int], config: dict | None) -> None:
+        async with sem:
+            try:
+                if config is None:
+                    await client.delete_portforward(vmnet, key[0], key[1])
+                else:
+                    await client.update_portforward(vmnet, key[0], key[1], config)
+            except (RuntimeError, httpx.HTTPError) as e:
+                report["errors"].append({"rule": f"{key[0]}/{key[1]}", "error": str(e)})
+
+    await asyncio.gather(*(apply(key, config) for items in changes.values() for key, config in items))
+    return report
@@ -0,0 +1,56 @@
+"""Shared process runner for the vmrun and vmcli command line tools."""
+
+import asyncio
+import time
+
+from .health import get_breaker
+from .profiling import sanitize_argv, span
+from .scheduler import get_scheduler
+from .tracing import get_tracer
+
+
+async def run_backend(backend: str, cmd: list[str], cls: str, vm: str = "") -> tuple[int, str, str]:
+    """Run ``cmd`` as a ``backend`` ("vmrun" or "vmcli") process and return its exit code, stdout and stderr.
+
+    The call goes through the backend's circuit breaker and a scheduler slot of class
+    ``cls`` for ``vm``, is answered from the trace when replaying and recorded when
+    recording. Failing to start the process raises RuntimeError.
+    """
+    argv = sanitize_argv(cmd[1:])
+    tracer = get_tracer()
+    breaker = get_breaker(backend)
+    breaker.before_call()
+    async with get_scheduler().slot(cls, vm):
+        if tracer is not None and tracer.replaying:
+            entry = await tracer.replay(backend, argv)
+            if entry["rc"] is None:
+                raise RuntimeError(f"{backend} failed to start: {entry['err']}")
+            return entry["rc"], entry["out"], entry["err"]
+
+        started = time.monotonic()
+        try:
+            with span("spawn"):
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+        except OSError as e:
+            breaker.record_failure(e)
+            if tracer is not None:
+                tracer.record(backend, argv, None, "", str(e), time.monotonic() - started)
+            raise RuntimeError(f"{backend} failed to start: {e}") from e
+        breaker.record_success()
+        try:
+            with span(backend, argv=argv):
+                out, err = await proc.communicate()
+        except asyncio.CancelledError:
+            # Don't leave the process running when the caller (e.g. a cancelled job) gives up
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        stdout, stderr = out.decode("utf-8", errors="replace"), err.decode("utf-8", errors="replace")
+        if tracer is not None:
+            tracer.record(backend, argv, proc.returncode, stdout, stderr, time.monotonic() - started)
+        return proc.returncode, stdout, stderr
@@ -0,0 +1,143 @@
+"""Opt-in per-call phase timing, slow-call log and cProfile dumps."""
+
+import cProfile
+import json
+import logging
+import logging.handlers
+import os
+import pstats
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+# Spans of the tool call running in the current context; None when profiling is off
+_spans: ContextVar[list | None] = ContextVar("vmware_mcp_spans", default=None)
+
+# vmrun -gp/-vp and vmcli -P take guest/VM passwords
+_SECRET_FLAGS = {"-gp", "-vp", "-P"}
+_SECRET_KEY = re.compile(r"pass|secret|token", re.I)
+
+
+def sanitize_argv(argv: list[str]) -> list[str]:
+    """Copy of a command line with password values masked."""
+    clean = list(argv)
+    for i, arg in enumerate(clean[:-1]):
+        if arg in _SECRET_FLAGS:
+            clean[i + 1] = "***"
+    return clean
+
+
+def sanitize_args(arguments: dict) -> dict:
+    """Tool arguments without password-like keys."""
+    return {k: v for k, v in arguments.items() if not _SECRET_KEY.search(k)}
+
+
+@contextmanager
+def span(phase: str, **detail):
+    """Record how long the block took as a phase of the current tool call (no-op unless profiling)."""
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append({"phase": phase, "ms": round((time.perf_counter() - started) * 1000, 2), **detail})
+
+
+class Profiler:
+    """Times each tool call and logs the slow ones.
+
+    Calls taking at least ``slow_ms`` go to a rotating JSON-lines log together with their
+    phase spans. With ``cprofile_dir`` set, each call also runs under cProfile and the
+    accumulated stats are written to ``<cprofile_dir>/<tool>.prof``; only one call is
+    profiled at a time, and concurrent calls show up in its stats.
+    """
+
+    def __init__(self, enabled: bool = False, slow_ms: float = 1000.0, log_path: str = "", cprofile_dir: str = ""):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.log_path = log_path or os.path.join(os.path.expanduser("~"), ".vmware-mcp", "slow_calls.log")
+        self.cprofile_dir = cprofile_dir
+        self.recent: deque[dict] = deque(maxlen=20)
+        self._logger: logging.Logger | None = None
+        self._stats: dict[str, pstats.Stats] = {}
+        self._profiling = False
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        return cls(
+            enabled=os.getenv("VMWARE_PROFILE", "").lower() in ("1", "true", "yes"),
+            slow_ms=float(os.getenv("VMWARE_PROFILE_SLOW_MS", "1000")),
+            log_path=os.getenv("VMWARE_PROFILE_LOG", ""),
+            cprofile_dir=os.getenv("VMWARE_PROFILE_DIR", ""),
+        )
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled, "slow_ms": self.slow_ms, "log": self.log_path,
+            "cprofile_dir": self.cprofile_dir or None, "recent_slow_calls": list(self.recent),
+        }
+
+    def _log(self, record: dict) -> None:
+        if self._logger is None:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(self.log_path, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+            self._logger = logging.getLogger("vmware_mcp.slow_calls")
+            self._logger.addHandler(handler)
+            self._logger.setLevel(logging.INFO)
+            # stdout carries the MCP protocol; keep these records out of any root handlers
+            self._logger.propagate = False
+        self._logger.info(json.dumps(record, default=str))
+
+    def _dump(self, tool: str, profile: cProfile.Profile) -> None:
+        stats = self._stats.get(tool)
+        if stats is None:
+            stats = self._stats[tool] = pstats.Stats(profile)
+        else:
+            stats.add(profile)
+        os.makedirs(self.cprofile_dir, exist_ok=True)
+        stats.dump_stats(os.path.join(self.cprofile_dir, f"{tool}.prof"))
+
+    @asynccontextmanager
+    async def call(self, tool: str, arguments: dict):
+        if not self.enabled:
+            yield
+            return
+        spans: list[dict] = []
+        token = _spans.set(spans)
+        profile = None
+        if self.cprofile_dir and not self._profiling:
+            self._profiling = True
+            profile = cProfile.Profile()
+            profile.enable()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            total_ms = round((time.perf_counter() - started) * 1000, 2)
+            _spans.reset(token)
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+                try:
+                    self._dump(tool, profile)
+                except OSError:
+                    pass
+            if total_ms >= self.slow_ms:
+                record = {
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "tool": tool, "ms": total_ms,
+                    "arguments": sanitize_args(arguments), "spans": spans, "error": error,
+                }
+                self.recent.append(record)
+                try:
+                    self._log(record)
+                except OSError:
+                    pass
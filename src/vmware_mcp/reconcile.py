@@ -0,0 +1,189 @@
+"""Declarative VM spec reconciliation against the parsed .vmx."""
+
+import asyncio
+import time
+
+from .vmcli import VMCli
+from .vmdk import read_vmdk, resolve_disk_path
+from .vmrun import VMRun
+from .vmx import (
+    apply_vmx_changes, is_suspended, read_vmx, shared_folders_enabled, validate_changes, vmx_disks, vmx_nics, vmx_shared_folders,
+    vmx_value,
+)
+
+GB = 1024 ** 3
+
+
+def _step(backend: str, op: str, reason: str, **args) -> dict:
+    return {"backend": backend, "op": op, "args": args, "reason": reason}
+
+
+def plan(spec: dict, vmx_path: str, config: dict[str, str], running: bool) -> dict:
+    """Compute the minimal operations that bring the VM to ``spec``.
+
+    For a powered-off VM every setting is a .vmx key, so they collapse into a single
+    atomic ``apply_vmx_changes`` step; a running VM gets the equivalent vmcli/vmrun
+    calls instead. Disk creation and growth are separate vmcli steps in both cases.
+    ``spec`` keys: cpu, memory (MB), cores_per_socket, nics, shared_folders, disks.
+    """
+    keys: dict[str, str] = {}
+    live: list[dict] = []
+    warnings: list[str] = []
+
+    def scalar(field: str, key: str, default: str, op: str, arg: str) -> None:
+        if field in spec and str(spec[field]) != config.get(key.lower(), default):
+            keys[key] = str(spec[field])
+            live.append(_step("vmcli", op, f"{key} {config.get(key.lower(), default) or '-'} -> {spec[field]}", **{arg: spec[field]}))
+
+    scalar("cpu", "numvcpus", "1", "chipset_set_cpu", "count")
+    scalar("memory", "memsize", "", "chipset_set_memory", "size_mb")
+    scalar("cores_per_socket", "cpuid.coresPerSocket", "1", "chipset_set_cores_per_socket", "cores")
+
+    nics = {n["index"]: n for n in vmx_nics(config)}
+    for want in spec.get("nics", []):
+        i = want["index"]
+        have = nics.get(i, {"present": False, "type": "", "vmnet": "", "device": ""})
+        prefix = f"ethernet{i}"
+        present = want.get("present", True)
+        if present != have["present"]:
+            keys[f"{prefix}.present"] = vmx_value(present)
+            live.append(_step("vmcli", "ethernet_set_present", f"{prefix} present -> {present}", index=i, present=present))
+        if not present:
+            continue
+        if i not in nics:
+            keys[f"{prefix}.addressType"] = "generated"
+        conn_type = want.get("type") or ("custom" if "network" in want else None)
+        if conn_type and conn_type != have["type"]:
+            keys[f"{prefix}.connectionType"] = conn_type
+            live.append(_step("vmcli", "ethernet_set_connection_type", f"{prefix} type {have['type'] or '-'} -> {conn_type}", index=i, conn_type=conn_type))
+        if "network" in want and want["network"].lower() != have["vmnet"]:
+            keys[f"{prefix}.vnet"] = want["network"]
+            live.append(_step("vmcli", "ethernet_set_network_name", f"{prefix} network {have['vmnet'] or '-'} -> {want['network']}", index=i, name=want["network"]))
+        if "device" in want and want["device"] != have["device"]:
+            keys[f"{prefix}.virtualDev"] = want["device"]
+            live.append(_step("vmcli", "ethernet_set_virtual_device", f"{prefix} device {have['device'] or '-'} -> {want['device']}", index=i, device=want["device"]))
+
+    folders = {f["name"].lower(): f for f in vmx_shared_folders(config)}
+    next_index = max((f["index"] for f in folders.values()), default=-1) + 1
+    max_num = int(config.get("sharedfolder.maxnum", "0") or 0)
+    for want in spec.get("shared_folders", []):
+        have = folders.get(want["name"].lower())
+        writable = want.get("writable", True)
+        if have and have["present"] and have["enabled"] and have["host_path"] == want["host_path"] and have["writable"] == writable:
+            continue
+        if have:
+            index = have["index"]
+            live.append(_step("vmrun", "set_shared_folder_state", f"share {want['name']} updated", name=want["name"], host_path=want["host_path"], writable=writable))
+        else:
+            index, next_index = next_index, next_index + 1
+            live.append(_step("vmrun", "add_shared_folder", f"share {want['name']} added", name=want["name"], host_path=want["host_path"]))
+            if not writable:
+                live.append(_step("vmrun", "set_shared_folder_state", f"share {want['name']} read-only", name=want["name"], host_path=want["host_path"], writable=False))
+        prefix = f"sharedFolder{index}"
+        keys.update({
+            f"{prefix}.present": "TRUE", f"{prefix}.enabled": "TRUE", f"{prefix}.readAccess": "TRUE",
+            f"{prefix}.writeAccess": vmx_value(writable), f"{prefix}.hostPath": want["host_path"],
+            f"{prefix}.guestName": want["name"], f"{prefix}.expiration": "never",
+        })
+        max_num = max(max_num, index + 1)
+        keys["sharedFolder.maxNum"] = str(max_num)
+    if spec.get("shared_folders") and not shared_folders_enabled(config):
+        keys["isolation.tools.hgfs.disable"] = "FALSE"
+        live.insert(0, _step("vmrun", "enable_shared_folders", "shared folders enabled"))
+
+    disk_steps = []
+    disks = {(d["bus"], d["adapter"], d["device"]): d for d in vmx_disks(config)}
+    for want in spec.get("disks", []):
+        bus, adapter, device = want.get("type", "scsi"), want.get("adapter", 0), want.get("device", 0)
+        size_gb = want["size_gb"]
+        have = disks.get((bus, adapter, device))
+        if have is None:
+            disk_steps.append(_step("vmcli", "disk_create", f"{bus}{adapter}:{device} created ({size_gb} GB)", size_gb=size_gb, disk_type=bus, adapter=adapter, device=device))
+            continue
+        try:
+            capacity = read_vmdk(resolve_disk_path(vmx_path, have["file"]))["capacity"]
+        except OSError as e:
+            warnings.append(f"{bus}{adapter}:{device}: cannot read {have['file']}: {e}")
+            continue
+        if capacity < size_gb * GB:
+            # Growing only rewrites the disk's own files, so it can run alongside .vmx edits
+            step = _step("vmcli", "disk_extend", f"{bus}{adapter}:{device} {capacity / GB:g} -> {size_gb} GB", new_size_gb=size_gb, adapter=adapter, device=device)
+            disk_steps.append({**step, "parallel": True})
+        elif capacity > size_gb * GB:
+            warnings.append(f"{bus}{adapter}:{device} is {capacity / GB:g} GB; disks cannot be shrunk to {size_gb} GB")
+
+    if running:
+        steps = live + disk_steps
+    else:
+        steps = ([_step("vmx", "apply_vmx_changes", f"{len(keys)} .vmx keys in one write", settings=keys)] if keys else []) + disk_steps
+    return {"running": running, "steps": steps, "warnings": warnings}
+
+
+async def execute(steps: list[dict], vmx_path: str, vmcli: VMCli, vmrun: VMRun) -> list[dict]:
+    """Run the planned steps: .vmx-touching steps in order, ``parallel`` ones concurrently beside them."""
+    backends = {"vmcli": vmcli, "vmrun": vmrun}
+
+    async def run(step: dict) -> dict:
+        started = time.monotonic()
+        try:
+            if step["backend"] == "vmx":
+                output = apply_vmx_changes(vmx_path, step["args"]["settings"])
+            else:
+                output = await getattr(backends[step["backend"]], step["op"])(vmx_path, **step["args"])
+            outcome = {"ok": True, "output": output}
+        except (RuntimeError, ValueError, OSError) as e:
+            outcome = {"ok": False, "error": str(e)}
+        return {**step, **outcome, "seconds": round(time.monotonic() - started, 3)}
+
+    async def in_order(serial: list[dict]) -> list[dict]:
+        return [await run(step) for step in serial]
+
+    serial = [s for s in steps if not s.get("parallel")]
+    parallel = [s for s in steps if s.get("parallel")]
+    ordered, *concurrent = await asyncio.gather(in_order(serial), *(run(s) for s in parallel))
+    return ordered + concurrent
+
+
+async def config_apply(vmcli: VMCli, vmrun: VMRun, vmx_path: str, settings: dict) -> dict:
+    """Set many .vmx keys at once: one atomic file write when powered off, vmcli per key when running.
+
+    vmcli sets one key per process, so a running VM costs one spawn per key, as with
+    ``config_set``. Suspended VMs are refused: changing their hardware breaks resume.
+    """
+    if not await vmrun.is_running(vmx_path):
+        if is_suspended(vmx_path):
+            raise RuntimeError("VM is suspended; resume it or power it off before changing its configuration")
+        return apply_vmx_changes(vmx_path, settings)
+    settings = {k: vmx_value(v) for k, v in settings.items()}
+    validate_changes(settings)
+    results = {}
+    for key, value in settings.items():
+        if value is None:
+            results[key] = "error: keys cannot be removed while the VM is running"
+            continue
+        try:
+            await vmcli.config_set(vmx_path, key, value)
+            results[key] = "ok"
+        except RuntimeError as e:
+            results[key] = f"error: {e}"
+    return {"method": "vmcli", "results": results}
+
+
+async def reconcile(vmcli: VMCli, vmrun: VMRun, vmx_path: str, spec: dict, dry_run: bool) -> dict:
+    """Diff ``spec`` against the VM's .vmx and, unless ``dry_run``, apply the minimal plan.
+
+    The plan of a suspended VM is returned but never applied, since changing its
+    hardware breaks resume.
+    """
+    running = await vmrun.is_running(vmx_path)
+    result = plan(spec, vmx_path, read_vmx(vmx_path), running)
+    if not running and is_suspended(vmx_path):
+        result["suspended"] = True
+        if result["steps"]:
+            result["warnings"].append("VM is suspended; resume it or power it off before reconciling")
+            result["ok"] = False
+        return result
+    if not dry_run and result["steps"]:
+        result["applied"] = await execute(result["steps"], vmx_path, vmcli, vmrun)
+        result["ok"] = all(step["ok"] for step in result["applied"])
+    return result
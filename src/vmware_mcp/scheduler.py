@@ -0,0 +1,157 @@
+"""Priority scheduling of vmrun/vmcli processes."""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from .profiling import span
+
+INTERACTIVE, MUTATION, BULK = "interactive", "mutation", "bulk"
+CLASSES = (INTERACTIVE, MUTATION, BULK)
+
+# MCP session of the tool call in progress, for fairness between clients
+current_session: ContextVar[str] = ContextVar("vmware_mcp_session", default="")
+
+_VMRUN_INTERACTIVE = {
+    "list", "checktoolsstate", "getguestipaddress", "listsnapshots", "fileexistsinguest", "directoryexistsinguest",
+    "listdirectoryinguest", "listprocessesinguest", "readvariable", "listhostnetworks", "listportforwardings",
+}
+_VMRUN_BULK = {
+    "clone", "upgradevm", "deletevm", "installtools", "deletesnapshot",
+}
+_VMCLI_BULK = {("vmtemplate", "deploy"), ("vmtemplate", "create"), ("disk", "create"), ("disk", "extend"), ("snapshot", "clone"), ("snapshot", "delete")}
+
+
+def classify_vmrun(command: str) -> str:
+    command = command.lower()
+    if command in _VMRUN_INTERACTIVE:
+        return INTERACTIVE
+    return BULK if command in _VMRUN_BULK else MUTATION
+
+
+def classify_vmcli(module: str, command: str) -> str:
+    if command.lower() == "query":
+        return INTERACTIVE
+    return BULK if (module.lower(), command.lower()) in _VMCLI_BULK else MUTATION
+
+
+class _ClassStats:
+    def __init__(self):
+        self.running = 0
+        self.completed = 0
+        self.waits: deque[float] = deque(maxlen=500)
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        self.waits.append(wait)
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self, queued: int) -> dict:
+        waits = sorted(self.waits)
+        granted = self.completed + self.running
+        return {
+            "queued": queued, "running": self.running, "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / granted * 1000, 1) if granted else 0.0,
+            "p95_wait_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+class Scheduler:
+    """Shares ``slots`` concurrent backend processes between three classes of work.
+
+    Interactive reads may use every slot; mutations and bulk work together may use all but
+    ``reserved_interactive`` of them, and bulk work at most ``bulk_slots``. When a slot frees
+    up, interactive waiters go first, then mutations, then bulk. Within a class, waiters
+    are served round-robin across (session, VM) pairs, so one client's batch against one VM
+    cannot hold up everyone else.
+    """
+
+    def __init__(self, slots: int = 8, reserved_interactive: int = 2, bulk_slots: int = 4):
+        self.slots = max(1, slots)
+        self.reserved_interactive = min(max(0, reserved_interactive), self.slots - 1)
+        self.bulk_slots = max(1, bulk_slots)
+        self._queues: dict[str, OrderedDict[tuple, deque[asyncio.Future]]] = {c: OrderedDict() for c in CLASSES}
+        self._stats = {c: _ClassStats() for c in CLASSES}
+
+    @classmethod
+    def from_env(cls) -> "Scheduler":
+        return cls(
+            slots=int(os.getenv("VMWARE_SCHED_SLOTS", "8")),
+            reserved_interactive=int(os.getenv("VMWARE_SCHED_INTERACTIVE_RESERVED", "2")),
+            bulk_slots=int(os.getenv("VMWARE_SCHED_BULK_SLOTS", "4")),
+        )
+
+    def _can_start(self, cls: str) -> bool:
+        running = {c: s.running for c, s in self._stats.items()}
+        if sum(running.values()) >= self.slots:
+            return False
+        if cls == INTERACTIVE:
+            return True
+        if running[MUTATION] + running[BULK] >= self.slots - self.reserved_interactive:
+            return False
+        return cls != BULK or running[BULK] < self.bulk_slots
+
+    def _dispatch(self) -> None:
+        for cls in CLASSES:
+            queue = self._queues[cls]
+            while queue and self._can_start(cls):
+                key, waiters = next(iter(queue.items()))
+                future = waiters.popleft()
+                # Rotate to the back so other (session, VM) pairs get the next turn
+                del queue[key]
+                if waiters:
+                    queue[key] = waiters
+                if future.done():
+                    continue
+                self._stats[cls].running += 1
+                future.set_result(None)
+
+    def _release(self, cls: str) -> None:
+        self._stats[cls].running -= 1
+        self._stats[cls].completed += 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, cls: str, vm: str = ""):
+        """Hold one backend slot of class ``cls`` for the duration of the block."""
+        queued = time.monotonic()
+        if not any(self._queues[c] for c in CLASSES[:CLASSES.index(cls) + 1]) and self._can_start(cls):
+            self._stats[cls].running += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._queues[cls].setdefault((current_session.get(), vm), deque()).append(future)
+            try:
+                with span("queue", cls=cls):
+                    await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Granted just as the waiter was cancelled: hand the slot on
+                    self._release(cls)
+                raise
+        self._stats[cls].record_wait(time.monotonic() - queued)
+        try:
+            yield
+        finally:
+            self._release(cls)
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots, "reserved_interactive": self.reserved_interactive, "bulk_slots": self.bulk_slots,
+            "classes": {c: self._stats[c].to_dict(sum(len(w) for w in self._queues[c].values())) for c in CLASSES},
+        }
+
+
+_scheduler: Scheduler | None = None
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler.from_env()
+    return _scheduler
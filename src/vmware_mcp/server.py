@@ -1,26 +1,81 @@
 """VMware MCP Server - Complete implementation with REST API, vmcli, and vmrun."""
 
+import asyncio
 import json
 import os
+import httpx
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from . import guest_helper
+from .cache import ResultCache
 from .client import VMwareClient
+from .deploy import deploy_many
+from .fastcopy import copy_to_guest
+from .fleet import fleet_revert, fleet_snapshot
+from .guestio import exec_in_guest, read_guest_file, write_guest_file
+from .health import backend_health
+from .inventory import inventory
+from .ipindex import IPIndex, lookup_ips
+from .jobs import JobRegistry
+from .keystrokes import KeystrokePipeline, render_vmcli, render_vmrun
+from .portforward import sync_portforwards
+from .profiling import Profiler, span
+from .reconcile import config_apply, reconcile
+from .scheduler import current_session, get_scheduler
+from .storage import storage_report
 from .vmcli import VMCli
+from .vmlog import LogTailer, log_path
 from .vmrun import VMRun
+from .vmx import is_windows_guest, norm_path, read_inventory, read_vmx, resolve_from_inventory
+from .watcher import StateWatcher
 
 server = Server("vmware-mcp")
 _vm_path_cache: dict[str, str] = {}
+_client: VMwareClient | None = None
+_watcher: StateWatcher | None = None
+_helpers: dict[str, guest_helper.HelperChannel] = {}
+_keys = KeystrokePipeline.from_env()
+_jobs = JobRegistry.from_env()
+_ip_index = IPIndex(ttl=float(os.getenv("VMWARE_IP_INDEX_TTL", "30")))
+_cache = ResultCache.from_env()
+_profiler = Profiler.from_env()
+_log_tailer = LogTailer()
+
+# Tools after which the watcher must re-read the VM's state instead of serving it from memory
+_STATE_CHANGING = {
+    "vm_power_set", "vmrun_start", "vmrun_stop", "vmrun_reset", "vmrun_suspend", "vmrun_pause", "vmrun_unpause",
+    "vmrun_snapshot_revert", "vmrun_tools_install", "snapshot_revert", "tools_install", "tools_upgrade",
+    "power_start", "power_stop", "power_pause", "power_unpause", "power_reset", "power_suspend",
+}
+
+# Query tools whose results are cached and can be served from cache via ``max_age``
+_CACHED_READS = {
+    "vm_list", "vm_get", "vm_power_get", "vm_nic_list", "vm_folder_list", "network_list", "network_portforward_list",
+    "vmrun_list", "vmrun_snapshot_list", "vmrun_tools_state", "vmrun_host_networks", "vmrun_portforward_list",
+    "snapshot_list", "mks_query", "chipset_query", "tools_query", "disk_query", "config_query", "power_query",
+    "ethernet_query", "hgfs_query", "serial_query", "sata_query", "nvme_query", "vprobes_query",
+}
+
+# Other tools that change nothing; every tool outside both sets invalidates the cache for its VM
+_READ_ONLY = {
+    "backend_health", "scheduler_stats", "profile_config", "job_status", "job_wait", "vm_inventory", "vm_log_tail", "storage_report", "vm_ip_get", "vm_ip_lookup",
+    "vmrun_file_exists", "vmrun_dir_exists", "vmrun_ls", "vmrun_copy_from", "guest_read_file", "vmrun_ps", "vmrun_var_read",
+    "vmrun_screenshot", "vmrun_guest_ip", "guest_ps", "guest_ls", "guest_copy_from", "guest_env", "mks_screenshot",
+}
 
 
 def get_client() -> VMwareClient:
-    return VMwareClient(
-        host=os.getenv("VMWARE_HOST", "localhost"),
-        port=int(os.getenv("VMWARE_PORT", "8697")),
-        username=os.getenv("VMWARE_USERNAME", ""),
-        password=os.getenv("VMWARE_PASSWORD", ""),
-    )
+    global _client
+    if _client is None:
+        _client = VMwareClient(
+            host=os.getenv("VMWARE_HOST", "localhost"),
+            port=int(os.getenv("VMWARE_PORT", "8697")),
+            username=os.getenv("VMWARE_USERNAME", ""),
+            password=os.getenv("VMWARE_PASSWORD", ""),
+        )
+    return _client
 
 
 def get_vmcli() -> VMCli:
@@ -31,18 +86,95 @@ def get_vmrun() -> VMRun:
     return VMRun()
 
 
+def remember_vms(vms: list[dict]) -> list[dict]:
+    """Record the ID-to-path mapping of vmrest VM entries; returns ``vms``."""
+    for vm in vms:
+        _vm_path_cache[vm["id"]] = vm["path"]
+    return vms
+
+
 async def get_vmx_path(vm_id: str) -> str:
     """Convert VM ID to vmx path. Supports both VM IDs and direct vmx paths."""
     # If vm_id is already a vmx path, return it directly
     if vm_id.endswith(".vmx") or "/" in vm_id or "\\" in vm_id:
         return vm_id
 
-    if vm_id not in _vm_path_cache:
-        client = get_client()
-        vms = await client.list_vms()
-        for vm in vms:
-            _vm_path_cache[vm["id"]] = vm["path"]
-    return _vm_path_cache.get(vm_id, "")
+    with span("resolve_vm", vm_id=vm_id):
+        if vm_id not in _vm_path_cache:
+            try:
+                remember_vms(await get_client().list_vms())
+            except (RuntimeError, httpx.HTTPError):
+                # vmrest is down (or its circuit is open): fall back to the local VM library
+                return resolve_from_inventory(vm_id)
+        return _vm_path_cache.get(vm_id) or resolve_from_inventory(vm_id)
+
+
+async def known_vm_paths() -> list[str]:
+    """Paths of all known VMs, from vmrest or else the local inventory."""
+    try:
+        vms = remember_vms(await get_client().list_vms())
+    except (RuntimeError, httpx.HTTPError):
+        return [vm["path"] for vm in read_inventory()]
+    return [vm["path"] for vm in vms]
+
+
+def watched(path: str):
+    """Watcher state for ``path`` if the background watcher is running and has it."""
+    return _watcher.get(path) if _watcher is not None else None
+
+
+def helper_channel(vmx_path: str, host_dir: str = "") -> guest_helper.HelperChannel:
+    if host_dir:
+        return _helpers.setdefault(vmx_path, guest_helper.HelperChannel(host_dir))
+    if vmx_path not in _helpers:
+        raise RuntimeError("No guest helper running for this VM; call helper_start first")
+    return _helpers[vmx_path]
+
+
+def forget_state(vmx_path: str) -> None:
+    """Drop cached results and watcher state of a VM changed outside the per-call invalidation."""
+    _cache.invalidate(*vm_scopes(vmx_path))
+    if _watcher is not None:
+        _watcher.invalidate(vmx_path)
+
+
+def session_key() -> str:
+    """Identity of the MCP session making the current request."""
+    try:
+        return f"session-{id(server.request_context.session)}"
+    except LookupError:
+        return "default"
+
+
+def progress_reporter():
+    """Callback sending MCP progress notifications for the current request, if the client asked for them."""
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+
+    async def report(elapsed: float, message: str | None = None) -> None:
+        await ctx.session.send_progress_notification(token, round(elapsed, 1), message=message)
+
+    return report
+
+
+async def run_job(name: str, a: dict, coro):
+    """Run a long operation as a job: return its ID right away when ``background`` is set, else wait for it."""
+    job = _jobs.start(name, coro)
+    # A background job outlives the call, so drop what it made stale again once it ends
+    job.task.add_done_callback(lambda _: invalidate_call(name, a))
+    if a.get("background"):
+        return {"job_id": job.id, "status": job.status}
+    try:
+        await _jobs.wait(job.id, on_tick=progress_reporter())
+    except asyncio.CancelledError:
+        job.task.cancel()
+        raise
+    return job.task.result()
 
 
 def T(name: str, desc: str, props: dict, required: list | None = None) -> Tool:
@@ -55,10 +187,11 @@ def T(name: str, desc: str, props: dict, required: list | None = None) -> Tool:
 
 @server.list_tools()
 async def list_tools() -> list[Tool]:
-    return [
+    tools = [
         # ==================== REST API ====================
         # VM Management
         T("vm_list", "List all VMs", {}),
+        T("vm_inventory", "Snapshot settings, power, IP and NICs of every VM in one table", {"concurrency": {"type": "integer"}, "timeout": {"type": "number"}}),
         T("vm_get", "Get VM settings", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("vm_create", "Clone a VM (REST)", {"vm_id": {"type": "string"}, "name": {"type": "string"}}, ["vm_id", "name"]),
         T("vm_delete", "Delete a VM", {"vm_id": {"type": "string"}}, ["vm_id"]),
@@ -71,6 +204,7 @@ async def list_tools() -> list[Tool]:
         T("vm_nic_create", "Create VM network adapter", {"vm_id": {"type": "string"}, "type": {"type": "string", "enum": ["bridged", "nat", "hostonly", "custom"]}}, ["vm_id", "type"]),
         T("vm_nic_delete", "Delete VM network adapter", {"vm_id": {"type": "string"}, "index": {"type": "integer"}}, ["vm_id", "index"]),
         T("vm_ip_get", "Get VM IP address (REST)", {"vm_id": {"type": "string"}}, ["vm_id"]),
+        T("vm_ip_lookup", "IPs of many VMs from the host MAC-to-IP index (DHCP leases + mactoip), falling back per VM on misses", {"vm_ids": {"type": "array", "items": {"type": "string"}}, "fallback": {"type": "boolean"}}),
         # VM Shared Folders
         T("vm_folder_list", "List VM shared folders", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("vm_folder_create", "Create VM shared folder", {"vm_id": {"type": "string"}, "folder_id": {"type": "string"}, "host_path": {"type": "string"}, "flags": {"type": "integer"}}, ["vm_id", "folder_id", "host_path"]),
@@ -80,12 +214,13 @@ async def list_tools() -> list[Tool]:
         T("network_create", "Create host virtual network", {"name": {"type": "string"}, "type": {"type": "string", "enum": ["bridged", "nat", "hostonly"]}}, ["name", "type"]),
         T("network_portforward_list", "List port forwards", {"vmnet": {"type": "string"}}, ["vmnet"]),
         T("network_portforward_set", "Set port forward", {"vmnet": {"type": "string"}, "protocol": {"type": "string", "enum": ["tcp", "udp"]}, "port": {"type": "integer"}, "guest_ip": {"type": "string"}, "guest_port": {"type": "integer"}}, ["vmnet", "protocol", "port", "guest_ip", "guest_port"]),
+        T("portforward_sync", "Make a vmnet's port forwards match the given rules, applying only the differences", {"vmnet": {"type": "string"}, "rules": {"type": "array", "items": {"type": "object", "properties": {"protocol": {"type": "string", "enum": ["tcp", "udp"]}, "port": {"type": "integer"}, "guest_ip": {"type": "string"}, "guest_port": {"type": "integer"}, "description": {"type": "string"}}, "required": ["protocol", "port", "guest_ip", "guest_port"]}}, "prune": {"type": "boolean", "description": "Delete rules not listed (default true)"}, "dry_run": {"type": "boolean"}, "concurrency": {"type": "integer"}}, ["vmnet", "rules"]),
         T("network_portforward_delete", "Delete port forward", {"vmnet": {"type": "string"}, "protocol": {"type": "string"}, "port": {"type": "integer"}}, ["vmnet", "protocol", "port"]),
 
         # ==================== VMRUN ====================
         # General
         T("vmrun_list", "List all running VMs", {}),
-        T("vmrun_clone", "Clone VM (full/linked)", {"vm_id": {"type": "string"}, "dest_path": {"type": "string"}, "clone_type": {"type": "string", "enum": ["full", "linked"]}, "snapshot": {"type": "string"}, "clone_name": {"type": "string"}}, ["vm_id", "dest_path"]),
+        T("vmrun_clone", "Clone VM (full/linked)", {"vm_id": {"type": "string"}, "dest_path": {"type": "string"}, "clone_type": {"type": "string", "enum": ["full", "linked"]}, "snapshot": {"type": "string"}, "clone_name": {"type": "string"}, "background": {"type": "boolean", "description": "Return a job ID immediately"}}, ["vm_id", "dest_path"]),
         T("vmrun_upgrade", "Upgrade VM format", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("vmrun_delete", "Delete VM (vmrun)", {"vm_id": {"type": "string"}}, ["vm_id"]),
         # Power (vmrun)
@@ -96,6 +231,8 @@ async def list_tools() -> list[Tool]:
         T("vmrun_pause", "Pause VM", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("vmrun_unpause", "Unpause VM", {"vm_id": {"type": "string"}}, ["vm_id"]),
         # Snapshot (vmrun)
+        T("fleet_snapshot", "Take a named snapshot of many VMs concurrently; per-VM duration and failures", {"vm_ids": {"type": "array", "items": {"type": "string"}}, "name": {"type": "string"}, "concurrency": {"type": "integer", "description": "Default 4"}, "background": {"type": "boolean", "description": "Return a job ID immediately"}}, ["vm_ids", "name"]),
+        T("fleet_revert", "Revert many VMs to a named snapshot concurrently, optionally powering them on and waiting for VMware Tools", {"vm_ids": {"type": "array", "items": {"type": "string"}}, "name": {"type": "string"}, "power_on": {"type": "boolean"}, "gui": {"type": "boolean"}, "wait_tools": {"type": "boolean"}, "tools_timeout": {"type": "number", "description": "Seconds (default 300)"}, "concurrency": {"type": "integer", "description": "Default 4"}, "background": {"type": "boolean", "description": "Return a job ID immediately"}}, ["vm_ids", "name"]),
         T("vmrun_snapshot_list", "List snapshots (tree)", {"vm_id": {"type": "string"}, "show_tree": {"type": "boolean"}}, ["vm_id"]),
         T("vmrun_snapshot_take", "Take snapshot", {"vm_id": {"type": "string"}, "name": {"type": "string"}}, ["vm_id", "name"]),
         T("vmrun_snapshot_delete", "Delete snapshot", {"vm_id": {"type": "string"}, "name": {"type": "string"}, "delete_children": {"type": "boolean"}}, ["vm_id", "name"]),
@@ -108,14 +245,21 @@ async def list_tools() -> list[Tool]:
         T("vmrun_rmdir", "Delete directory in guest", {"vm_id": {"type": "string"}, "path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "path"]),
         T("vmrun_rm", "Delete file in guest", {"vm_id": {"type": "string"}, "path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "path"]),
         T("vmrun_rename", "Rename file in guest", {"vm_id": {"type": "string"}, "old_path": {"type": "string"}, "new_path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "old_path", "new_path"]),
-        T("vmrun_copy_to", "Copy file from host to guest", {"vm_id": {"type": "string"}, "host_path": {"type": "string"}, "guest_path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "host_path", "guest_path"]),
+        T("vmrun_copy_to", "Copy file from host to guest (large files go through a temporary shared folder)", {"vm_id": {"type": "string"}, "host_path": {"type": "string"}, "guest_path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}, "fast_threshold_mb": {"type": "number"}}, ["vm_id", "host_path", "guest_path"]),
         T("vmrun_copy_from", "Copy file from guest to host", {"vm_id": {"type": "string"}, "guest_path": {"type": "string"}, "host_path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "guest_path", "host_path"]),
+        T("guest_read_file", "Read a guest file inline (capped at max_bytes, default 1 MiB); optionally a byte range or only the last N lines", {"vm_id": {"type": "string"}, "guest_path": {"type": "string"}, "offset": {"type": "integer"}, "length": {"type": "integer"}, "tail_lines": {"type": "integer"}, "encoding": {"type": "string", "enum": ["utf-8", "base64"]}, "max_bytes": {"type": "integer"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "guest_path"]),
+        T("guest_write_file", "Write inline text (or base64) content to a guest file", {"vm_id": {"type": "string"}, "guest_path": {"type": "string"}, "content": {"type": "string"}, "encoding": {"type": "string", "enum": ["utf-8", "base64"]}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "guest_path", "content"]),
         T("vmrun_temp_file", "Create temp file in guest", {"vm_id": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id"]),
         # Guest Process
         T("vmrun_run", "Run program in guest", {"vm_id": {"type": "string"}, "program": {"type": "string"}, "args": {"type": "string"}, "no_wait": {"type": "boolean"}, "interactive": {"type": "boolean"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "program"]),
+        T("guest_exec", "Run a command in the guest and return stdout, stderr, exit code and duration; new stdout is sent as progress messages while it runs; on timeout the command is killed", {"vm_id": {"type": "string"}, "argv": {"type": "array", "items": {"type": "string"}, "description": "Program and arguments, quoted for the guest automatically"}, "cwd": {"type": "string"}, "timeout": {"type": "number", "description": "Seconds (default 300)"}, "max_bytes": {"type": "integer", "description": "Cap per output stream (default 1 MiB)"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "argv"]),
         T("vmrun_script", "Run script in guest", {"vm_id": {"type": "string"}, "interpreter": {"type": "string"}, "script": {"type": "string"}, "no_wait": {"type": "boolean"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "interpreter", "script"]),
         T("vmrun_ps", "List processes in guest", {"vm_id": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id"]),
         T("vmrun_kill", "Kill process in guest", {"vm_id": {"type": "string"}, "pid": {"type": "integer"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "pid"]),
+        # Guest helper (batched guest operations over a shared folder)
+        T("helper_start", "Start the guest helper on an HGFS shared folder", {"vm_id": {"type": "string"}, "host_dir": {"type": "string"}, "share_name": {"type": "string"}, "python": {"type": "string", "description": "Full path of the guest Python interpreter (default /usr/bin/python3; required for Windows guests)"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "host_dir"]),
+        T("helper_batch", "Run a batch of guest operations through the helper (ops: read_file, write_file, list_dir, exists, mkdir, remove, rename, run, env)", {"vm_id": {"type": "string"}, "ops": {"type": "array", "items": {"type": "object"}}, "host_dir": {"type": "string"}, "stop_on_error": {"type": "boolean"}, "timeout": {"type": "number"}}, ["vm_id", "ops"]),
+        T("helper_stop", "Stop the guest helper", {"vm_id": {"type": "string"}}, ["vm_id"]),
         # Shared Folders (vmrun)
         T("vmrun_shared_enable", "Enable shared folders", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("vmrun_shared_disable", "Disable shared folders", {"vm_id": {"type": "string"}}, ["vm_id"]),
@@ -130,9 +274,9 @@ async def list_tools() -> list[Tool]:
         T("vmrun_var_write", "Write VM variable", {"vm_id": {"type": "string"}, "var_type": {"type": "string", "enum": ["runtimeConfig", "guestEnv", "guestVar"]}, "name": {"type": "string"}, "value": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "var_type", "name", "value"]),
         # Screen/Input
         T("vmrun_screenshot", "Capture VM screenshot", {"vm_id": {"type": "string"}, "output_path": {"type": "string"}}, ["vm_id", "output_path"]),
-        T("vmrun_keystrokes", "Type keystrokes in guest", {"vm_id": {"type": "string"}, "keystrokes": {"type": "string"}}, ["vm_id", "keystrokes"]),
+        T("vmrun_keystrokes", "Type keystrokes in guest ({ENTER}, {TAB}, {SPACE} markup; {{ and }} for braces)", {"vm_id": {"type": "string"}, "keystrokes": {"type": "string"}, "cps": {"type": "number", "description": "Characters per second"}}, ["vm_id", "keystrokes"]),
         # Tools/Network
-        T("vmrun_tools_install", "Install VMware Tools", {"vm_id": {"type": "string"}}, ["vm_id"]),
+        T("vmrun_tools_install", "Install VMware Tools", {"vm_id": {"type": "string"}, "background": {"type": "boolean", "description": "Return a job ID immediately"}}, ["vm_id"]),
         T("vmrun_tools_state", "Check VMware Tools state", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("vmrun_guest_ip", "Get guest IP address", {"vm_id": {"type": "string"}, "wait": {"type": "boolean"}}, ["vm_id"]),
         T("vmrun_host_networks", "List host networks", {}),
@@ -145,7 +289,7 @@ async def list_tools() -> list[Tool]:
         T("snapshot_list", "List snapshots (vmcli)", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("snapshot_take", "Take snapshot (vmcli)", {"vm_id": {"type": "string"}, "name": {"type": "string"}}, ["vm_id", "name"]),
         T("snapshot_revert", "Revert to snapshot (vmcli)", {"vm_id": {"type": "string"}, "name": {"type": "string"}}, ["vm_id", "name"]),
-        T("snapshot_delete", "Delete snapshot (vmcli)", {"vm_id": {"type": "string"}, "name": {"type": "string"}, "delete_children": {"type": "boolean"}}, ["vm_id", "name"]),
+        T("snapshot_delete", "Delete snapshot (vmcli)", {"vm_id": {"type": "string"}, "name": {"type": "string"}, "delete_children": {"type": "boolean"}, "background": {"type": "boolean", "description": "Return a job ID immediately"}}, ["vm_id", "name"]),
         T("snapshot_clone", "Clone from snapshot", {"vm_id": {"type": "string"}, "snapshot_name": {"type": "string"}, "dest_path": {"type": "string"}, "clone_type": {"type": "string", "enum": ["linked", "full"]}}, ["vm_id", "snapshot_name", "dest_path"]),
         # Guest
         T("guest_run", "Run program in guest", {"vm_id": {"type": "string"}, "program": {"type": "string"}, "args": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "program"]),
@@ -155,12 +299,12 @@ async def list_tools() -> list[Tool]:
         T("guest_mkdir", "Create directory", {"vm_id": {"type": "string"}, "path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "path"]),
         T("guest_rm", "Delete file", {"vm_id": {"type": "string"}, "path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "path"]),
         T("guest_rmdir", "Delete directory", {"vm_id": {"type": "string"}, "path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "path"]),
-        T("guest_copy_to", "Copy to guest", {"vm_id": {"type": "string"}, "host_path": {"type": "string"}, "guest_path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "host_path", "guest_path"]),
+        T("guest_copy_to", "Copy to guest (large files go through a temporary shared folder)", {"vm_id": {"type": "string"}, "host_path": {"type": "string"}, "guest_path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}, "fast_threshold_mb": {"type": "number"}}, ["vm_id", "host_path", "guest_path"]),
         T("guest_copy_from", "Copy from guest", {"vm_id": {"type": "string"}, "guest_path": {"type": "string"}, "host_path": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id", "guest_path", "host_path"]),
         T("guest_env", "Get environment", {"vm_id": {"type": "string"}, "user": {"type": "string"}, "password": {"type": "string"}}, ["vm_id"]),
         # MKS
         T("mks_screenshot", "Capture screenshot", {"vm_id": {"type": "string"}, "output_path": {"type": "string"}}, ["vm_id", "output_path"]),
-        T("mks_send_key", "Send key sequence", {"vm_id": {"type": "string"}, "key_sequence": {"type": "string"}}, ["vm_id", "key_sequence"]),
+        T("mks_send_key", "Send a key sequence with special-key markup ({ENTER}, {F5}, {CTRL+ALT+DEL}; {{ and }} for literal braces); long input is chunked and paced", {"vm_id": {"type": "string"}, "key_sequence": {"type": "string"}, "cps": {"type": "number", "description": "Characters per second"}}, ["vm_id", "key_sequence"]),
         T("mks_query", "Query MKS state", {"vm_id": {"type": "string"}}, ["vm_id"]),
         # Chipset
         T("chipset_query", "Query chipset config", {"vm_id": {"type": "string"}}, ["vm_id"]),
@@ -173,14 +317,17 @@ async def list_tools() -> list[Tool]:
         T("tools_upgrade", "Upgrade Tools", {"vm_id": {"type": "string"}}, ["vm_id"]),
         # Template
         T("template_create", "Create template", {"vm_id": {"type": "string"}, "template_path": {"type": "string"}, "name": {"type": "string"}}, ["vm_id", "template_path", "name"]),
-        T("template_deploy", "Deploy template", {"template_path": {"type": "string"}, "dest_path": {"type": "string"}, "name": {"type": "string"}}, ["template_path", "dest_path", "name"]),
+        T("template_deploy", "Deploy template", {"template_path": {"type": "string"}, "dest_path": {"type": "string"}, "name": {"type": "string"}, "background": {"type": "boolean", "description": "Return a job ID immediately"}}, ["template_path", "dest_path", "name"]),
+        T("template_deploy_many", "Deploy a template as several named VMs in parallel, throttled per destination volume", {"template_path": {"type": "string"}, "dest_path": {"type": "string", "description": "Parent directory; each VM goes to dest_path/<name>"}, "names": {"type": "array", "items": {"type": "string"}}, "background": {"type": "boolean", "description": "Return a job ID immediately"}}, ["template_path", "dest_path", "names"]),
         # Disk
         T("disk_query", "Query disk config", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("disk_create", "Create disk", {"vm_id": {"type": "string"}, "size_gb": {"type": "integer"}, "disk_type": {"type": "string"}, "adapter": {"type": "integer"}, "device": {"type": "integer"}}, ["vm_id", "size_gb"]),
-        T("disk_extend", "Extend disk", {"vm_id": {"type": "string"}, "new_size_gb": {"type": "integer"}, "adapter": {"type": "integer"}, "device": {"type": "integer"}}, ["vm_id", "new_size_gb"]),
+        T("disk_extend", "Extend disk", {"vm_id": {"type": "string"}, "new_size_gb": {"type": "integer"}, "adapter": {"type": "integer"}, "device": {"type": "integer"}, "background": {"type": "boolean", "description": "Return a job ID immediately"}}, ["vm_id", "new_size_gb"]),
         # Config
         T("config_query", "Query config params", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("config_set", "Set config param", {"vm_id": {"type": "string"}, "key": {"type": "string"}, "value": {"type": "string"}}, ["vm_id", "key", "value"]),
+        T("config_apply", "Set many .vmx keys at once (null removes a key): one atomic file write when powered off; when running, one vmcli call per key (no faster than config_set); refused while suspended", {"vm_id": {"type": "string"}, "settings": {"type": "object", "additionalProperties": {"type": ["string", "number", "boolean", "null"]}}}, ["vm_id", "settings"]),
+        T("vm_reconcile", "Bring a VM to a declarative spec (cpu, memory MB, cores_per_socket, nics, shared_folders, disks) with the minimal set of changes; dry_run returns the plan only", {"vm_id": {"type": "string"}, "spec": {"type": "object", "properties": {"cpu": {"type": "integer"}, "memory": {"type": "integer"}, "cores_per_socket": {"type": "integer"}, "nics": {"type": "array", "items": {"type": "object", "properties": {"index": {"type": "integer"}, "type": {"type": "string", "enum": ["bridged", "nat", "hostonly", "custom"]}, "network": {"type": "string"}, "device": {"type": "string"}, "present": {"type": "boolean"}}, "required": ["index"]}}, "shared_folders": {"type": "array", "items": {"type": "object", "properties": {"name": {"type": "string"}, "host_path": {"type": "string"}, "writable": {"type": "boolean"}}, "required": ["name", "host_path"]}}, "disks": {"type": "array", "items": {"type": "object", "properties": {"type": {"type": "string", "enum": ["ide", "scsi", "sata", "nvme"]}, "adapter": {"type": "integer"}, "device": {"type": "integer"}, "size_gb": {"type": "integer"}}, "required": ["size_gb"]}}}}, "dry_run": {"type": "boolean"}}, ["vm_id", "spec"]),
         # Power (vmcli)
         T("power_query", "Query power state", {"vm_id": {"type": "string"}}, ["vm_id"]),
         T("power_start", "Start VM", {"vm_id": {"type": "string"}}, ["vm_id"]),
@@ -221,11 +368,88 @@ async def list_tools() -> list[Tool]:
         T("vprobes_enable", "Enable VProbes", {"vm_id": {"type": "string"}, "enabled": {"type": "boolean"}}, ["vm_id", "enabled"]),
         T("vprobes_load", "Load VProbes script", {"vm_id": {"type": "string"}, "script_path": {"type": "string"}}, ["vm_id", "script_path"]),
         T("vprobes_reset", "Reset VProbes", {"vm_id": {"type": "string"}}, ["vm_id"]),
+        # ==================== SERVER ====================
+        # Jobs
+        T("job_status", "Status of a background job, or of all retained jobs", {"job_id": {"type": "string"}}),
+        T("job_wait", "Wait for a background job to finish", {"job_id": {"type": "string"}, "timeout": {"type": "number"}}, ["job_id"]),
+        T("job_cancel", "Cancel a background job", {"job_id": {"type": "string"}}, ["job_id"]),
+        # Diagnostics
+        T("backend_health", "Circuit breaker state of vmrest, vmrun and vmcli", {}),
+        T("scheduler_stats", "Backend process scheduler: slots per class (interactive/mutation/bulk), queue lengths and queue-wait times", {}),
+        T("profile_config", "Turn per-call profiling on/off and show recent slow calls with their phase timings", {"enabled": {"type": "boolean"}, "slow_ms": {"type": "number"}, "cprofile_dir": {"type": "string", "description": "Directory for per-tool cProfile dumps; empty string disables"}}),
+        T("storage_report", "Disk snapshot-chain depth and extent sizes per VM (all known VMs by default), flagging VMs over the thresholds; unchanged descriptors come from an on-disk index", {"vm_ids": {"type": "array", "items": {"type": "string"}}, "max_chain_depth": {"type": "integer", "description": "Flag disks with more delta disks than this (default 4)"}, "max_total_gb": {"type": "number", "description": "Flag VMs whose disks use more than this (default 200)"}}),
+        T("vm_log_tail", "Return new lines of the VM's vmware.log since this client's last call (first call: the tail), optionally regex-filtered", {"vm_id": {"type": "string"}, "pattern": {"type": "string", "description": "Regex; only matching lines are returned"}, "ignore_case": {"type": "boolean"}, "max_bytes": {"type": "integer", "description": "Bytes of log to read per call (default 65536)"}, "from_start": {"type": "boolean"}, "client_id": {"type": "string", "description": "Offset key; defaults to the MCP session"}}, ["vm_id"]),
     ]
+    for tool in tools:
+        if tool.name in _CACHED_READS:
+            tool.inputSchema["properties"]["max_age"] = {"type": "number", "description": "Accept a cached result up to this many seconds old"}
+    return tools
+
+
+def cache_scope(arguments: dict) -> str:
+    """Cache scope of a call: the VM's normalized .vmx path (its raw ID while unresolved), or "" for host-wide tools."""
+    vm_id = arguments.get("vm_id")
+    return norm_path(_vm_path_cache.get(vm_id, vm_id)) if vm_id else ""
+
+
+def vm_scopes(vm_id: str) -> set[str]:
+    """Cache scopes of a VM: its ID or path as given, its resolved path and every other ID known for that path."""
+    path = norm_path(_vm_path_cache.get(vm_id, vm_id))
+    return {norm_path(vm_id), path, *(norm_path(other) for other, p in _vm_path_cache.items() if norm_path(p) == path)}
+
+
+def invalidate_call(name: str, arguments: dict) -> None:
+    """Drop cached results and watcher state a mutating call may have made stale.
+
+    Reads made before the VM's ID was resolved are cached under the raw ID, so the raw
+    ID, the resolved path and every other ID known for that path are all dropped.
+    """
+    vm_id = arguments.get("vm_id")
+    if not vm_id:
+        _cache.invalidate()
+        return
+    _cache.invalidate(*vm_scopes(vm_id))
+    if _watcher is not None and name in _STATE_CHANGING:
+        _watcher.invalidate(_vm_path_cache.get(vm_id, vm_id))
 
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+    current_session.set(session_key())
+    async with _profiler.call(name, arguments):
+        return await cached_call(name, arguments)
+
+
+async def cached_call(name: str, arguments: dict) -> list[TextContent]:
+    a = arguments
+    age = None
+    if name in _CACHED_READS:
+        key = (name, json.dumps({k: v for k, v in a.items() if k != "max_age"}, sort_keys=True))
+        hit = _cache.get(key, a["max_age"]) if a.get("max_age") else None
+        if hit is None:
+            result, age = await dispatch(name, a), 0.0
+            _cache.put(key, cache_scope(a), result)
+        else:
+            result, age = hit
+    else:
+        result = await dispatch(name, a)
+        if name not in _READ_ONLY:
+            if name in _STATE_CHANGING:
+                # Make sure the watcher sees the resolved path, also for REST-only calls
+                await get_vmx_path(a["vm_id"])
+            invalidate_call(name, a)
+
+    with span("serialize"):
+        if isinstance(result, str):
+            content = [TextContent(type="text", text=result if result else "OK")]
+        else:
+            content = [TextContent(type="text", text=json.dumps(result, indent=2) if result else "OK")]
+    if age is not None and "max_age" in a:
+        content.append(TextContent(type="text", text=json.dumps({"cache_age": round(age, 1)})))
+    return content
+
+
+async def dispatch(name: str, arguments: dict):
     client = get_client()
     vmcli = get_vmcli()
     vmrun = get_vmrun()
@@ -238,9 +462,9 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
 
     # ==================== REST API ====================
     if name == "vm_list":
-        result = await client.list_vms()
-        for vm in result:
-            _vm_path_cache[vm["id"]] = vm["path"]
+        result = remember_vms(await client.list_vms())
+    elif name == "vm_inventory":
+        result = await inventory(client, remember_vms(await client.list_vms()), a.get("concurrency", 8), a.get("timeout", 10.0))
     elif name == "vm_get":
         result = await client.get_vm(a["vm_id"])
     elif name == "vm_create":
@@ -252,7 +476,11 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         settings = {k: v for k, v in a.items() if k != "vm_id" and v is not None}
         result = await client.update_vm(a["vm_id"], settings)
     elif name == "vm_power_get":
-        result = await client.get_power_state(a["vm_id"])
+        # The watcher cannot tell paused from powered on, so only its unambiguous states are served
+        if (state := watched(_vm_path_cache.get(a["vm_id"], ""))) and state.power != "running":
+            result = {"power_state": state.power, "staleness": round(state.power_staleness, 1)}
+        else:
+            result = await client.get_power_state(a["vm_id"])
     elif name == "vm_power_set":
         result = await client.change_power_state(a["vm_id"], a["state"])
     elif name == "vm_nic_list":
@@ -263,7 +491,17 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         await client.delete_nic(a["vm_id"], a["index"])
         result = {"status": "deleted"}
     elif name == "vm_ip_get":
-        result = await client.get_vm_ip(a["vm_id"])
+        if (state := watched(_vm_path_cache.get(a["vm_id"], ""))) and state.ip:
+            result = {"ip": state.ip, "staleness": round(state.staleness, 1)}
+        else:
+            result = await client.get_vm_ip(a["vm_id"])
+    elif name == "vm_ip_lookup":
+        if a.get("vm_ids"):
+            paths = {vm_id: await vmx(vm_id) for vm_id in a["vm_ids"]}
+        else:
+            known = await known_vm_paths()
+            paths = dict(_vm_path_cache) or {p: p for p in known}
+        result = await lookup_ips(_ip_index, client, vmrun, paths, set(_vm_path_cache), a.get("fallback", True))
     elif name == "vm_folder_list":
         result = await client.list_shared_folders(a["vm_id"])
     elif name == "vm_folder_create":
@@ -279,6 +517,8 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         result = await client.get_portforwards(a["vmnet"])
     elif name == "network_portforward_set":
         result = await client.update_portforward(a["vmnet"], a["protocol"], a["port"], {"guestIp": a["guest_ip"], "guestPort": a["guest_port"]})
+    elif name == "portforward_sync":
+        result = await sync_portforwards(client, a["vmnet"], a["rules"], a.get("prune", True), a.get("dry_run", False), a.get("concurrency", 8))
     elif name == "network_portforward_delete":
         await client.delete_portforward(a["vmnet"], a["protocol"], a["port"])
         result = {"status": "deleted"}
@@ -287,7 +527,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "vmrun_list":
         result = await vmrun.list_running()
     elif name == "vmrun_clone":
-        result = await vmrun.clone(await vmx(a["vm_id"]), a["dest_path"], a.get("clone_type", "linked"), a.get("snapshot", ""), a.get("clone_name", ""))
+        result = await run_job(name, a, vmrun.clone(await vmx(a["vm_id"]), a["dest_path"], a.get("clone_type", "linked"), a.get("snapshot", ""), a.get("clone_name", "")))
     elif name == "vmrun_upgrade":
         result = await vmrun.upgrade_vm(await vmx(a["vm_id"]))
     elif name == "vmrun_delete":
@@ -304,6 +544,16 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         result = await vmrun.pause(await vmx(a["vm_id"]))
     elif name == "vmrun_unpause":
         result = await vmrun.unpause(await vmx(a["vm_id"]))
+    elif name in ("fleet_snapshot", "fleet_revert"):
+        paths = {v: await vmx(v) for v in a["vm_ids"]}
+        if name == "fleet_snapshot":
+            work = fleet_snapshot(vmrun, paths, a["name"], a.get("concurrency", 4), forget_state)
+        else:
+            work = fleet_revert(
+                vmrun, paths, a["name"], a.get("power_on", False), a.get("wait_tools", False),
+                a.get("tools_timeout", 300.0), a.get("gui", False), a.get("concurrency", 4), forget_state,
+            )
+        result = await run_job(name, a, work)
     elif name == "vmrun_snapshot_list":
         result = await vmrun.list_snapshots(await vmx(a["vm_id"]), a.get("show_tree", False))
     elif name == "vmrun_snapshot_take":
@@ -327,19 +577,46 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "vmrun_rename":
         result = await vmrun.rename_file(await vmx(a["vm_id"]), a["old_path"], a["new_path"], a.get("user", ""), a.get("password", ""))
     elif name == "vmrun_copy_to":
-        result = await vmrun.copy_to_guest(await vmx(a["vm_id"]), a["host_path"], a["guest_path"], a.get("user", ""), a.get("password", ""))
+        result = await copy_to_guest(vmrun, await vmx(a["vm_id"]), a["host_path"], a["guest_path"], a.get("user", ""), a.get("password", ""), vmrun.copy_to_guest, a.get("fast_threshold_mb"))
     elif name == "vmrun_copy_from":
         result = await vmrun.copy_from_guest(await vmx(a["vm_id"]), a["guest_path"], a["host_path"], a.get("user", ""), a.get("password", ""))
+    elif name == "guest_read_file":
+        result = await read_guest_file(
+            vmrun, await vmx(a["vm_id"]), a["guest_path"], a.get("user", ""), a.get("password", ""),
+            a.get("offset", 0), a.get("length"), a.get("tail_lines"), a.get("encoding", "utf-8"), a.get("max_bytes"),
+        )
+    elif name == "guest_write_file":
+        result = await write_guest_file(vmrun, await vmx(a["vm_id"]), a["guest_path"], a["content"], a.get("user", ""), a.get("password", ""), a.get("encoding", "utf-8"))
     elif name == "vmrun_temp_file":
         result = await vmrun.create_temp_file(await vmx(a["vm_id"]), a.get("user", ""), a.get("password", ""))
     elif name == "vmrun_run":
         result = await vmrun.run_program(await vmx(a["vm_id"]), a["program"], a.get("args", ""), a.get("no_wait", False), False, a.get("interactive", False), a.get("user", ""), a.get("password", ""))
+    elif name == "guest_exec":
+        path = await vmx(a["vm_id"])
+        result = await exec_in_guest(
+            vmrun, path, a["argv"], is_windows_guest(read_vmx(path)), a.get("user", ""), a.get("password", ""),
+            a.get("cwd", ""), a.get("timeout", 300.0), a.get("max_bytes"), progress_reporter(),
+        )
     elif name == "vmrun_script":
         result = await vmrun.run_script(await vmx(a["vm_id"]), a["interpreter"], a["script"], a.get("no_wait", False), False, False, a.get("user", ""), a.get("password", ""))
     elif name == "vmrun_ps":
         result = await vmrun.list_processes(await vmx(a["vm_id"]), a.get("user", ""), a.get("password", ""))
     elif name == "vmrun_kill":
         result = await vmrun.kill_process(await vmx(a["vm_id"]), a["pid"], a.get("user", ""), a.get("password", ""))
+    elif name == "helper_start":
+        path = await vmx(a["vm_id"])
+        _helpers[path], result = await guest_helper.launch(
+            vmrun, path, a["host_dir"], a.get("share_name", "vmware-mcp-helper"), a.get("python", ""),
+            is_windows_guest(read_vmx(path)), a.get("user", ""), a.get("password", ""),
+        )
+    elif name == "helper_batch":
+        channel = helper_channel(await vmx(a["vm_id"]), a.get("host_dir", ""))
+        result = await channel.submit(a["ops"], a.get("timeout", 60.0), a.get("stop_on_error", False))
+    elif name == "helper_stop":
+        path = await vmx(a["vm_id"])
+        await helper_channel(path).submit([{"op": "stop"}])
+        del _helpers[path]
+        result = {"status": "stopped"}
     elif name == "vmrun_shared_enable":
         result = await vmrun.enable_shared_folders(await vmx(a["vm_id"]))
     elif name == "vmrun_shared_disable":
@@ -361,13 +638,22 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "vmrun_screenshot":
         result = await vmrun.capture_screen(await vmx(a["vm_id"]), a["output_path"])
     elif name == "vmrun_keystrokes":
-        result = await vmrun.type_keystrokes(await vmx(a["vm_id"]), a["keystrokes"])
+        path = await vmx(a["vm_id"])
+        result = await _keys.send(path, a["keystrokes"], lambda chunk: vmrun.type_keystrokes(path, chunk), render_vmrun, a.get("cps"))
     elif name == "vmrun_tools_install":
-        result = await vmrun.install_tools(await vmx(a["vm_id"]))
+        result = await run_job(name, a, vmrun.install_tools(await vmx(a["vm_id"])))
     elif name == "vmrun_tools_state":
-        result = await vmrun.check_tools_state(await vmx(a["vm_id"]))
+        path = await vmx(a["vm_id"])
+        if state := watched(path):
+            result = {"tools_state": state.tools, "staleness": round(state.staleness, 1)}
+        else:
+            result = await vmrun.check_tools_state(path)
     elif name == "vmrun_guest_ip":
-        result = await vmrun.get_guest_ip(await vmx(a["vm_id"]), a.get("wait", False))
+        path = await vmx(a["vm_id"])
+        if (state := watched(path)) and state.ip:
+            result = {"ip": state.ip, "staleness": round(state.staleness, 1)}
+        else:
+            result = await vmrun.get_guest_ip(path, a.get("wait", False))
     elif name == "vmrun_host_networks":
         result = await vmrun.list_host_networks()
     elif name == "vmrun_portforward_list":
@@ -385,7 +671,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "snapshot_revert":
         result = await vmcli.snapshot_revert(await vmx(a["vm_id"]), a["name"])
     elif name == "snapshot_delete":
-        result = await vmcli.snapshot_delete(await vmx(a["vm_id"]), a["name"], a.get("delete_children", False))
+        result = await run_job(name, a, vmcli.snapshot_delete(await vmx(a["vm_id"]), a["name"], a.get("delete_children", False)))
     elif name == "snapshot_clone":
         result = await vmcli.snapshot_clone(await vmx(a["vm_id"]), a["snapshot_name"], a["dest_path"], a.get("clone_type", "linked"))
     elif name == "guest_run":
@@ -403,7 +689,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "guest_rmdir":
         result = await vmcli.guest_rmdir(await vmx(a["vm_id"]), a["path"], a.get("user", ""), a.get("password", ""))
     elif name == "guest_copy_to":
-        result = await vmcli.guest_copy_to(await vmx(a["vm_id"]), a["host_path"], a["guest_path"], a.get("user", ""), a.get("password", ""))
+        result = await copy_to_guest(vmrun, await vmx(a["vm_id"]), a["host_path"], a["guest_path"], a.get("user", ""), a.get("password", ""), vmcli.guest_copy_to, a.get("fast_threshold_mb"))
     elif name == "guest_copy_from":
         result = await vmcli.guest_copy_from(await vmx(a["vm_id"]), a["guest_path"], a["host_path"], a.get("user", ""), a.get("password", ""))
     elif name == "guest_env":
@@ -411,7 +697,8 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "mks_screenshot":
         result = await vmcli.mks_screenshot(await vmx(a["vm_id"]), a["output_path"])
     elif name == "mks_send_key":
-        result = await vmcli.mks_send_key(await vmx(a["vm_id"]), a["key_sequence"])
+        path = await vmx(a["vm_id"])
+        result = await _keys.send(path, a["key_sequence"], lambda chunk: vmcli.mks_send_key(path, chunk), render_vmcli, a.get("cps"))
     elif name == "mks_query":
         result = await vmcli.mks_query(await vmx(a["vm_id"]))
     elif name == "chipset_query":
@@ -431,17 +718,23 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "template_create":
         result = await vmcli.template_create(await vmx(a["vm_id"]), a["template_path"], a["name"])
     elif name == "template_deploy":
-        result = await vmcli.template_deploy(a["template_path"], a["dest_path"], a["name"])
+        result = await run_job(name, a, vmcli.template_deploy(a["template_path"], a["dest_path"], a["name"]))
+    elif name == "template_deploy_many":
+        result = await run_job(name, a, deploy_many(vmcli, client, a["template_path"], a["dest_path"], a["names"], lambda vm: remember_vms([vm])))
     elif name == "disk_query":
         result = await vmcli.disk_query(await vmx(a["vm_id"]))
     elif name == "disk_create":
         result = await vmcli.disk_create(await vmx(a["vm_id"]), a["size_gb"], a.get("disk_type", "scsi"), a.get("adapter", 0), a.get("device", 0))
     elif name == "disk_extend":
-        result = await vmcli.disk_extend(await vmx(a["vm_id"]), a["new_size_gb"], a.get("adapter", 0), a.get("device", 0))
+        result = await run_job(name, a, vmcli.disk_extend(await vmx(a["vm_id"]), a["new_size_gb"], a.get("adapter", 0), a.get("device", 0)))
     elif name == "config_query":
         result = await vmcli.config_query(await vmx(a["vm_id"]))
     elif name == "config_set":
         result = await vmcli.config_set(await vmx(a["vm_id"]), a["key"], a["value"])
+    elif name == "config_apply":
+        result = await config_apply(vmcli, vmrun, await vmx(a["vm_id"]), a["settings"])
+    elif name == "vm_reconcile":
+        result = await reconcile(vmcli, vmrun, await vmx(a["vm_id"]), a["spec"], a.get("dry_run", False))
     elif name == "power_query":
         result = await vmcli.power_query(await vmx(a["vm_id"]))
     elif name == "power_start":
@@ -509,17 +802,49 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "vprobes_reset":
         result = await vmcli.vprobes_reset(await vmx(a["vm_id"]))
 
-    if isinstance(result, str):
-        return [TextContent(type="text", text=result if result else "OK")]
-    return [TextContent(type="text", text=json.dumps(result, indent=2) if result else "OK")]
+    # ==================== SERVER ====================
+    elif name == "job_status":
+        result = _jobs.get(a["job_id"]).to_dict() if a.get("job_id") else [j.to_dict() for j in _jobs.list()]
+    elif name == "job_wait":
+        result = (await _jobs.wait(a["job_id"], a.get("timeout"), progress_reporter())).to_dict()
+    elif name == "job_cancel":
+        job = _jobs.cancel(a["job_id"])
+        await asyncio.wait({job.task}, timeout=5)
+        result = job.to_dict()
+    elif name == "backend_health":
+        result = backend_health()
+    elif name == "scheduler_stats":
+        result = get_scheduler().stats()
+    elif name == "profile_config":
+        for key in ("enabled", "slow_ms", "cprofile_dir"):
+            if a.get(key) is not None:
+                setattr(_profiler, key, a[key])
+        result = _profiler.status()
+    elif name == "storage_report":
+        paths = [await vmx(v) for v in a["vm_ids"]] if a.get("vm_ids") else await known_vm_paths()
+        result = await asyncio.to_thread(storage_report, paths, a.get("max_chain_depth", 4), a.get("max_total_gb", 200.0))
+    elif name == "vm_log_tail":
+        result = _log_tailer.read(
+            log_path(await vmx(a["vm_id"])), a.get("client_id") or session_key(), a.get("pattern", ""),
+            a.get("max_bytes", 65536), a.get("from_start", False), a.get("ignore_case", False),
+        )
 
+    return result
 
-def main():
-    import asyncio
 
+def main():
     async def run():
-        async with stdio_server() as (read_stream, write_stream):
-            await server.run(read_stream, write_stream, server.create_initialization_options())
+        global _watcher
+        watch_task = None
+        if os.getenv("VMWARE_WATCH", "").lower() in ("1", "true", "yes"):
+            _watcher = StateWatcher.from_env(get_vmrun(), known_vm_paths)
+            watch_task = asyncio.create_task(_watcher.run())
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, server.create_initialization_options())
+        finally:
+            if watch_task is not None:
+                watch_task.cancel()
 
     asyncio.run(run())
 
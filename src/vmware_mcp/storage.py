@@ -0,0 +1,126 @@
+"""Disk usage and snapshot-chain analysis of VM directories, backed by an mtime-keyed index."""
+
+import json
+import os
+import time
+
+from .vmdk import read_vmdk, resolve_disk_path
+from .vmx import norm_path, read_vmx, vmx_disks
+
+GB = 1024 ** 3
+_MAX_CHAIN = 64
+
+
+def index_path() -> str:
+    return os.getenv("VMWARE_STORAGE_INDEX") or os.path.join(os.path.expanduser("~"), ".vmware-mcp", "storage_index.json")
+
+
+class StorageIndex:
+    """Parsed .vmx disk lists and VMDK descriptors, keyed by path and reused while mtime and size are unchanged."""
+
+    def __init__(self, path: str = ""):
+        self.path = path or index_path()
+        self.parsed = 0
+        self.reused = 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries: dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def lookup(self, path: str, parse) -> tuple[os.stat_result, object]:
+        """``(stat, parse(path))``, using the stored result if the file is unchanged."""
+        key = norm_path(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._entries.pop(key, None)
+            raise
+        entry = self._entries.get(key)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            self.reused += 1
+            return st, entry["info"]
+        info = parse(path)
+        self._entries[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "info": info}
+        self.parsed += 1
+        return st, info
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+
+
+def _chain(index: StorageIndex, top: str) -> list[dict]:
+    """The disk at ``top`` followed by its parents, each with its extents' on-disk size."""
+    chain, seen, path = [], set(), top
+    while path and norm_path(path) not in seen and len(chain) < _MAX_CHAIN:
+        seen.add(norm_path(path))
+        link = {"file": path}
+        try:
+            st, info = index.lookup(path, read_vmdk)
+        except OSError as e:
+            chain.append({**link, "error": str(e)})
+            break
+        size = 0
+        for extent in info["extents"]:
+            extent_path = resolve_disk_path(path, extent["file"]) if extent["file"] else path
+            if norm_path(extent_path) == norm_path(path):
+                size += st.st_size
+                continue
+            try:
+                size += os.path.getsize(extent_path)
+            except OSError:
+                link.setdefault("missing_extents", []).append(extent_path)
+        chain.append({**link, "create_type": info["create_type"], "capacity": info["capacity"], "bytes": size or st.st_size})
+        path = resolve_disk_path(path, info["parent"]) if info["parent"] else ""
+    return chain
+
+
+def scan_vm(index: StorageIndex, vmx_path: str, max_chain_depth: int, max_total_gb: float) -> dict:
+    _, disks = index.lookup(vmx_path, lambda p: vmx_disks(read_vmx(p)))
+    report = {"vmx": vmx_path, "disks": [], "bytes": 0, "flags": []}
+    for disk in disks:
+        device = f"{disk['bus']}{disk['adapter']}:{disk['device']}"
+        chain = _chain(index, resolve_disk_path(vmx_path, disk["file"]))
+        # Delta disks above the base disk
+        depth = len(chain) - 1
+        size = sum(link.get("bytes", 0) for link in chain)
+        report["disks"].append({"device": device, "depth": depth, "bytes": size, "chain": chain})
+        report["bytes"] += size
+        if depth > max_chain_depth:
+            report["flags"].append(f"{device}: snapshot chain depth {depth} > {max_chain_depth}")
+        if any("error" in link or "missing_extents" in link for link in chain):
+            report["flags"].append(f"{device}: broken chain or missing extent files")
+    if report["bytes"] > max_total_gb * GB:
+        report["flags"].append(f"disks use {report['bytes'] / GB:.1f} GB > {max_total_gb:g} GB")
+    return report
+
+
+def storage_report(vmx_paths: list[str], max_chain_depth: int = 4, max_total_gb: float = 200.0) -> dict:
+    """Per-VM disk chains and sizes, flagging VMs over the chain-depth or total-size thresholds.
+
+    Only descriptors and .vmx files whose mtime or size changed since the last scan are
+    re-read; everything is still stat'ed, which is what keeps the sizes current.
+    """
+    started = time.monotonic()
+    index = StorageIndex()
+    vms = []
+    for path in vmx_paths:
+        try:
+            vms.append(scan_vm(index, path, max_chain_depth, max_total_gb))
+        except OSError as e:
+            vms.append({"vmx": path, "error": str(e), "flags": [f"unreadable: {e}"]})
+    try:
+        index.save()
+    except OSError:
+        pass
+    return {
+        "vms": vms,
+        "flagged": [vm["vmx"] for vm in vms if vm["flags"]],
+        "files_parsed": index.parsed,
+        "files_reused": index.reused,
+        "seconds": round(time.monotonic() - started, 3),
+    }
@@ -0,0 +1,230 @@
+"""Record/replay of backend calls for reproducible performance runs.
+
+With ``VMWARE_TRACE_RECORD=<file>`` every vmrun/vmcli process and vmrest request is
+appended to a gzip-compressed JSON-lines trace: sanitized argv (or method and path),
+output, return code or HTTP status, and latency. With ``VMWARE_TRACE_REPLAY=<file>`` the
+backends are not called at all; each call is answered from the trace, in recorded order
+per identical call, after sleeping the recorded latency times ``VMWARE_TRACE_SCALE``.
+
+Calls are matched with the per-run random parts of their arguments (``vmware-mcp-*`` host
+temp dirs and share names) masked. Host files a call writes (guest-to-host copies and
+screenshots) are stored in the trace and written again on replay; files over
+``VMWARE_TRACE_MAX_FILE_MB`` (default 16) are stored as their size only and replayed as
+zero-filled files of that size.
+
+Summarize traces with ``python -m vmware_mcp.tracing <trace> [<trace> ...]``.
+"""
+
+import argparse
+import asyncio
+import atexit
+import base64
+import gzip
+import json
+import os
+import re
+import time
+from collections import defaultdict, deque
+
+import httpx
+
+_FLUSH_EVERY = 50
+# Random suffixes of tempfile dirs and uuid share names, which differ between runs
+_VOLATILE = re.compile(r"(vmware-mcp-)[a-z0-9_]{8}(?![a-z0-9_])")
+
+
+def _key(backend: str, key) -> str:
+    return _VOLATILE.sub(r"\1*", backend + "\0" + (key if isinstance(key, str) else "\0".join(key)))
+
+
+def _command(backend: str, argv: list[str]) -> list[str]:
+    """vmrun command or vmcli module and command, followed by their arguments."""
+    args = [a for a in argv if a not in ("-T", "ws")]
+    if backend == "vmrun":
+        # Skip the -gu/-gp/-vp option pairs before the command
+        while args and args[0].startswith("-"):
+            args = args[2:]
+    elif args and args[0].lower().endswith(".vmx"):
+        args = args[1:]
+    return args
+
+
+def _option(args: list[str], flag: str) -> str:
+    return args[args.index(flag) + 1] if flag in args[:-1] else ""
+
+
+def host_output(backend: str, argv) -> str:
+    """Host file written by a vmrun/vmcli call, which replay has to recreate."""
+    if backend == "vmrest":
+        return ""
+    args = _command(backend, argv)
+    if backend == "vmrun" and args:
+        command = args[0].lower()
+        if command == "copyfilefromguesttohost" and len(args) > 3:
+            return args[3]
+        if command == "capturescreen" and len(args) > 2:
+            return args[2]
+    elif backend == "vmcli" and len(args) > 1:
+        command = (args[0].lower(), args[1].lower())
+        if command == ("guest", "copyfrom"):
+            return _option(args, "-l")
+        if command == ("mks", "capturescreenshot"):
+            return _option(args, "-o")
+    return ""
+
+
+class Tracer:
+    def __init__(self, record_path: str = "", replay_path: str = "", scale: float = 1.0, max_file_bytes: int = 16 * 1024 * 1024):
+        self.scale = scale
+        self.max_file_bytes = max_file_bytes
+        self.replaying = bool(replay_path)
+        self._started = time.monotonic()
+        self._out = None
+        self._pending = 0
+        self._recorded: dict[str, deque[dict]] = defaultdict(deque)
+        if replay_path:
+            for entry in read_trace(replay_path):
+                self._recorded[_key(entry["b"], entry["k"])].append(entry)
+        elif record_path:
+            self._out = gzip.open(record_path, "at", encoding="utf-8")
+            atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls) -> "Tracer | None":
+        record, replay = os.getenv("VMWARE_TRACE_RECORD", ""), os.getenv("VMWARE_TRACE_REPLAY", "")
+        if not record and not replay:
+            return None
+        return cls(
+            record, replay, float(os.getenv("VMWARE_TRACE_SCALE", "1.0")),
+            int(float(os.getenv("VMWARE_TRACE_MAX_FILE_MB", "16")) * 1024 * 1024),
+        )
+
+    def record(self, backend: str, key, code: int | None, out: str, err: str, latency: float) -> None:
+        if self._out is None:
+            return
+        entry = {
+            "ts": round(time.monotonic() - self._started - latency, 4), "b": backend, "k": key,
+            "rc": code, "out": out, "err": err, "ms": round(latency * 1000, 2),
+        }
+        if code == 0 and (path := host_output(backend, key)):
+            entry.update(self._capture(path))
+        self._out.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._pending += 1
+        if self._pending >= _FLUSH_EVERY:
+            self._out.flush()
+            self._pending = 0
+
+    def _capture(self, path: str) -> dict:
+        try:
+            size = os.path.getsize(path)
+            if size > self.max_file_bytes:
+                return {"file_size": size}
+            with open(path, "rb") as f:
+                return {"file": base64.b64encode(f.read()).decode("ascii")}
+        except OSError:
+            return {}
+
+    @staticmethod
+    def _restore(path: str, entry: dict) -> None:
+        if "file" in entry:
+            with open(path, "wb") as f:
+                f.write(base64.b64decode(entry["file"]))
+        elif "file_size" in entry:
+            with open(path, "wb") as f:
+                f.truncate(entry["file_size"])
+
+    async def replay(self, backend: str, key) -> dict:
+        """The next recorded result of this call, after its (scaled) latency, with any host file it wrote recreated."""
+        recorded = self._recorded.get(_key(backend, key))
+        if not recorded:
+            shown = key if isinstance(key, str) else " ".join(key)
+            raise RuntimeError(f"trace has no recording of {backend} {shown}")
+        # The last recording of a call keeps answering repeats beyond those recorded
+        entry = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        if self.scale > 0:
+            await asyncio.sleep(entry["ms"] / 1000 * self.scale)
+        if entry["rc"] == 0 and (path := host_output(backend, key)):
+            self._restore(path, entry)
+        return entry
+
+    async def replay_http(self, method: str, url: str, path: str) -> httpx.Response:
+        entry = await self.replay("vmrest", f"{method} {path}")
+        request = httpx.Request(method, url)
+        if entry["rc"] is None:
+            raise httpx.ConnectError(entry["err"], request=request)
+        return httpx.Response(entry["rc"], content=entry["out"].encode("utf-8"), request=request)
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+
+_tracer: Tracer | None = None
+_loaded = False
+
+
+def get_tracer() -> Tracer | None:
+    global _tracer, _loaded
+    if not _loaded:
+        _tracer, _loaded = Tracer.from_env(), True
+    return _tracer
+
+
+def read_trace(path: str) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def operation(entry: dict) -> str:
+    """Call name used to group a trace entry: vmrun command, vmcli module and command, or REST route."""
+    key = entry["k"]
+    if entry["b"] == "vmrest":
+        return re.sub(r"/(vms|vmnet)/[^/]+", r"/\1/{id}", key.split("?")[0])
+    args = _command(entry["b"], key)
+    return " ".join(args[:1 if entry["b"] == "vmrun" else 2])
+
+
+def summarize(path: str) -> dict:
+    entries = read_trace(path)
+    groups: dict[tuple[str, str], list[dict]] = defaultdict(list)
+    for entry in entries:
+        groups[(entry["b"], operation(entry))].append(entry)
+    rows = []
+    for (backend, op), calls in sorted(groups.items(), key=lambda g: -sum(e["ms"] for e in g[1])):
+        ms = sorted(e["ms"] for e in calls)
+        failed = sum(1 for e in calls if e["rc"] is None or (e["rc"] != 0 if backend != "vmrest" else e["rc"] >= 400))
+        rows.append({
+            "backend": backend, "operation": op, "calls": len(calls), "errors": failed, "total_ms": round(sum(ms), 1),
+            "mean_ms": round(sum(ms) / len(ms), 1), "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))], "max_ms": ms[-1],
+        })
+    span = max((e["ts"] + e["ms"] / 1000 for e in entries), default=0.0) - min((e["ts"] for e in entries), default=0.0)
+    return {
+        "trace": path, "calls": len(entries), "seconds": round(span, 3),
+        "calls_per_second": round(len(entries) / span, 2) if span > 0 else 0.0, "operations": rows,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m vmware_mcp.tracing", description="Summarize vmware-mcp backend traces")
+    parser.add_argument("traces", nargs="+")
+    parser.add_argument("--json", action="store_true", help="print the summaries as JSON")
+    parser.add_argument("--top", type=int, default=20, help="operations to list per trace, by total time")
+    args = parser.parse_args()
+
+    summaries = [summarize(path) for path in args.traces]
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+        return
+    columns = ["backend", "operation", "calls", "errors", "total_ms", "mean_ms", "p95_ms", "max_ms"]
+    for summary in summaries:
+        print(f"{summary['trace']}: {summary['calls']} calls in {summary['seconds']}s ({summary['calls_per_second']}/s)")
+        table = [columns] + [[str(row[c]) for c in columns] for row in summary["operations"][:args.top]]
+        widths = [max(len(r[i]) for r in table) for i in range(len(columns))]
+        for r in table:
+            print("  " + "  ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip())
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 """VMware vmcli command line wrapper."""
 
-import asyncio
 import os
 import json
 from typing import Any
 
+from .process import run_backend
+from .scheduler import classify_vmcli
+
 
 class VMCli:
     """Wrapper for vmcli command line tool."""
@@ -22,18 +24,11 @@ class VMCli:
         cmd.extend([module, command])
         cmd.extend(args)
 
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate()
-
-        if proc.returncode != 0:
-            error_msg = stderr.decode("utf-8", errors="replace").strip()
-            raise RuntimeError(f"vmcli failed: {error_msg}")
+        returncode, stdout, stderr = await run_backend("vmcli", cmd, classify_vmcli(module, command), vmx_path or "")
+        if returncode != 0:
+            raise RuntimeError(f"vmcli failed: {stderr.strip()}")
 
-        return stdout.decode("utf-8", errors="replace").strip()
+        return stdout.strip()
 
     # === Snapshot ===
     async def snapshot_list(self, vmx_path: str) -> str:
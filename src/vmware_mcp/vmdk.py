@@ -0,0 +1,53 @@
+"""VMDK descriptor parsing."""
+
+import os
+import re
+import struct
+
+_EXTENT = re.compile(r'^(RW|RDONLY|NOACCESS)\s+(\d+)\s+(\S+)(?:\s+"([^"]*)")?', re.M)
+_FIELD = re.compile(r'^\s*([A-Za-z][\w.]*)\s*=\s*"?([^"\r\n]*)"?\s*$', re.M)
+_SPARSE_MAGIC = b"KDMV"
+_MAX_DESCRIPTOR = 1024 * 1024
+
+
+def read_descriptor(path: str) -> str:
+    """Descriptor text of a .vmdk, whether a separate text file or embedded in a monolithic sparse disk."""
+    with open(path, "rb") as f:
+        head = f.read(512)
+        if head[:4] == _SPARSE_MAGIC:
+            # SparseExtentHeader: descriptorOffset and descriptorSize (in sectors) at bytes 28 and 36
+            offset, size = struct.unpack_from("<QQ", head, 28)
+            if not offset:
+                return ""
+            f.seek(offset * 512)
+            return f.read(min(size * 512, _MAX_DESCRIPTOR)).split(b"\0", 1)[0].decode("utf-8", errors="replace")
+        if b"# Disk DescriptorFile" not in head and b"createType" not in head:
+            return ""
+        f.seek(0)
+        return f.read(_MAX_DESCRIPTOR).decode("utf-8", errors="replace")
+
+
+def parse_descriptor(text: str) -> dict:
+    fields = {k.lower(): v for k, v in _FIELD.findall(text)}
+    extents = [
+        {"access": m.group(1), "sectors": int(m.group(2)), "type": m.group(3), "file": m.group(4) or ""}
+        for m in _EXTENT.finditer(text)
+    ]
+    parent = fields.get("parentfilenamehint", "")
+    return {
+        "create_type": fields.get("createtype", ""),
+        "parent": parent,
+        "extents": extents,
+        "capacity": sum(e["sectors"] for e in extents) * 512,
+    }
+
+
+def read_vmdk(path: str) -> dict:
+    return parse_descriptor(read_descriptor(path))
+
+
+def resolve_disk_path(base: str, name: str) -> str:
+    """Resolve a disk file name from a .vmx or descriptor relative to the directory of ``base``."""
+    if os.path.isabs(name) or re.match(r"^[A-Za-z]:[\\/]", name):
+        return name
+    return os.path.join(os.path.dirname(base), name)
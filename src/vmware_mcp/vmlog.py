@@ -0,0 +1,85 @@
+"""Incremental reading of a VM's vmware.log."""
+
+import mmap
+import os
+import re
+from dataclasses import dataclass
+
+_SIGNATURE_BYTES = 64
+
+
+def log_path(vmx_path: str) -> str:
+    return os.path.join(os.path.dirname(vmx_path), "vmware.log")
+
+
+@dataclass
+class _Cursor:
+    offset: int
+    file_id: tuple
+    signature: bytes
+
+
+def _signature(view, size: int) -> bytes:
+    return bytes(view[:min(size, _SIGNATURE_BYTES)])
+
+
+class LogTailer:
+    """Per-client read positions in vmware.log files.
+
+    A client's first read starts ``max_bytes`` before the end of the file; later reads return
+    only lines appended since. Rotation (Workstation renames the log to vmware-0.log on power
+    on) is detected by a changed file identity, a shrunken file or a changed first line, and
+    restarts the client at the beginning of the new file.
+    """
+
+    def __init__(self):
+        self._cursors: dict[tuple[str, str], _Cursor] = {}
+
+    def read(self, path: str, client: str, pattern: str = "", max_bytes: int = 65536,
+             from_start: bool = False, ignore_case: bool = False) -> dict:
+        try:
+            regex = re.compile(pattern, re.I if ignore_case else 0) if pattern else None
+        except re.error as e:
+            raise ValueError(f"invalid pattern {pattern!r}: {e}") from e
+        key = (client, os.path.normcase(os.path.abspath(path)))
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            file_id = (st.st_dev, st.st_ino)
+            if size == 0:
+                self._cursors[key] = _Cursor(0, file_id, b"")
+                return {"log": path, "offset": 0, "size": 0, "rotated": False, "lines": [], "more": False}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                signature = _signature(view, size)
+                cursor = self._cursors.get(key)
+                rotated = cursor is not None and (
+                    cursor.file_id != file_id or cursor.offset > size or cursor.signature != signature[:len(cursor.signature)]
+                )
+                if from_start or rotated:
+                    start = 0
+                elif cursor is None:
+                    start = max(0, size - max_bytes)
+                    # Begin at a line boundary
+                    if start and (nl := view.find(b"\n", start - 1)) != -1:
+                        start = nl + 1
+                else:
+                    start = cursor.offset
+
+                end = min(size, start + max_bytes)
+                nl = view.rfind(b"\n", start, end)
+                if nl != -1:
+                    end = nl + 1
+                elif end == size:
+                    # Only a line still being written; pick it up once it is complete
+                    end = start
+                # else a single line longer than max_bytes is returned in pieces
+                chunk = view[start:end]
+
+        self._cursors[key] = _Cursor(end, file_id, signature)
+        lines = chunk.decode("utf-8", errors="replace").splitlines()
+        if regex is not None:
+            lines = [line for line in lines if regex.search(line)]
+        return {
+            "log": path, "offset": end, "size": size, "rotated": rotated,
+            "bytes_read": end - start, "lines": lines, "more": end < size,
+        }
@@ -1,8 +1,16 @@
 """VMware vmrun command line wrapper."""
 
-import asyncio
 import os
 
+from .process import run_backend
+from .scheduler import classify_vmrun
+from .vmx import norm_path
+
+
+def parse_list(output: str) -> list[str]:
+    """VMX paths from ``vmrun list`` output (first line is the "Total running VMs" header)."""
+    return [line.strip() for line in output.splitlines()[1:] if line.strip()]
+
 
 class VMRun:
     """Wrapper for vmrun command line tool."""
@@ -22,20 +30,13 @@ class VMRun:
         cmd.append(command)
         cmd.extend(args)
 
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate()
-
-        if proc.returncode != 0:
-            error_msg = stderr.decode("utf-8", errors="replace").strip()
-            if not error_msg:
-                error_msg = stdout.decode("utf-8", errors="replace").strip()
+        vm = args[0] if args and args[0].lower().endswith(".vmx") else ""
+        returncode, stdout, stderr = await run_backend("vmrun", cmd, classify_vmrun(command), vm)
+        if returncode != 0:
+            error_msg = stderr.strip() or stdout.strip()
             raise RuntimeError(f"vmrun failed: {error_msg}")
 
-        return stdout.decode("utf-8", errors="replace").strip()
+        return stdout.strip()
 
     # === Power ===
     async def start(self, vmx_path: str, gui: bool = True) -> str:
@@ -60,6 +61,9 @@ class VMRun:
     async def list_running(self) -> str:
         return await self._run("list")
 
+    async def is_running(self, vmx_path: str) -> bool:
+        return norm_path(vmx_path) in {norm_path(p) for p in parse_list(await self.list_running())}
+
     async def upgrade_vm(self, vmx_path: str) -> str:
         return await self._run("upgradevm", vmx_path)
 
@@ -135,7 +139,8 @@ class VMRun:
             cmd_args.append("-interactive")
         cmd_args.append(program)
         if args:
-            cmd_args.extend(args.split())
+            # vmrun hands the rest of its command line to the guest as-is; keep quoting intact
+            cmd_args.append(args)
         return await self._run("runProgramInGuest", *cmd_args, guest_user=user, guest_pass=password)
 
     async def run_script(self, vmx_path: str, interpreter: str, script: str, no_wait: bool = False, active_window: bool = False, interactive: bool = False, user: str = "", password: str = "") -> str:
@@ -0,0 +1,209 @@
+"""Readers and writers for VMware key/value config files (.vmx, inventory.vmls)."""
+
+import os
+import re
+import shutil
+
+_LINE = re.compile(r'^\s*([^#=\s][^=]*?)\s*=\s*"?(.*?)"?\s*$')
+_KEY = re.compile(r"^[A-Za-z0-9_.:\-]+$")
+_ETHERNET = re.compile(r"^ethernet(\d+)\.present$")
+_SHARED_FOLDER = re.compile(r"^sharedfolder(\d+)\.guestname$")
+_DISK = re.compile(r"^(scsi|sata|nvme|ide)(\d+):(\d+)\.filename$")
+# Default vmnet of each connection type; "custom" NICs name theirs in ethernetN.vnet
+_CONNECTION_VMNETS = {"bridged": "vmnet0", "hostonly": "vmnet1", "nat": "vmnet8"}
+
+
+def norm_path(path: str) -> str:
+    """Comparable form of a .vmx path."""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def parse_vmx(text: str) -> dict[str, str]:
+    """Parse ``key = "value"`` lines, keeping file order. Keys are lower-cased like VMware does."""
+    config: dict[str, str] = {}
+    for line in text.splitlines():
+        m = _LINE.match(line)
+        if m:
+            config[m.group(1).lower()] = m.group(2)
+    return config
+
+
+def read_vmx(path: str) -> dict[str, str]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return parse_vmx(f.read())
+
+
+def vmx_value(value) -> str | None:
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return None if value is None else str(value)
+
+
+def validate_changes(changes: dict[str, str | None]) -> None:
+    for key, value in changes.items():
+        if not _KEY.match(key):
+            raise ValueError(f"Invalid .vmx key: {key!r}")
+        if value is not None and any(c in str(value) for c in '"\r\n'):
+            raise ValueError(f"Invalid value for {key}: quotes and line breaks are not allowed")
+
+
+def update_vmx_text(text: str, changes: dict[str, str | None]) -> str:
+    """Apply ``changes`` to .vmx text; a None value removes the key.
+
+    Untouched lines keep their order and formatting, changed keys are rewritten in
+    place (dropping any duplicates) and new keys are appended.
+    """
+    newline = "\r\n" if "\r\n" in text else "\n"
+    pending = {k.lower(): (k, v) for k, v in changes.items()}
+    done = set()
+    out = []
+    for line in text.splitlines():
+        m = _LINE.match(line)
+        key = m.group(1).lower() if m else None
+        if key in done:
+            continue
+        if key in pending:
+            name, value = pending.pop(key)
+            done.add(key)
+            if value is not None:
+                out.append(f'{name} = "{value}"')
+            continue
+        out.append(line)
+    out.extend(f'{name} = "{value}"' for name, value in pending.values() if value is not None)
+    return newline.join(out) + newline
+
+
+def apply_vmx_changes(path: str, changes: dict[str, str | None]) -> dict:
+    """Write all ``changes`` to a .vmx in one atomic replace, keeping a ``.bak`` copy.
+
+    The result is re-read and compared; on any mismatch the backup is restored.
+    """
+    changes = {k: vmx_value(v) for k, v in changes.items()}
+    validate_changes(changes)
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        original = f.read()
+    backup = path + ".bak"
+    shutil.copy2(path, backup)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(update_vmx_text(original, changes))
+    os.replace(tmp, path)
+
+    written = read_vmx(path)
+    wrong = [k for k, v in changes.items() if written.get(k.lower()) != v]
+    if wrong:
+        shutil.copy2(backup, path)
+        raise RuntimeError(f"Verification of {path} failed for {', '.join(wrong)}; original restored")
+    return {"method": "vmx", "changed": sorted(changes), "backup": backup}
+
+
+def is_windows_guest(config: dict[str, str]) -> bool:
+    return config.get("guestos", "").lower().startswith(("win", "longhorn"))
+
+
+def is_suspended(vmx_path: str) -> bool:
+    """Whether a powered-down VM has a suspend checkpoint (``checkpoint.vmState`` or a .vmss file) to resume from."""
+    try:
+        if read_vmx(vmx_path).get("checkpoint.vmstate"):
+            return True
+    except OSError:
+        return False
+    directory = os.path.dirname(vmx_path) or "."
+    try:
+        return any(name.lower().endswith(".vmss") for name in os.listdir(directory))
+    except OSError:
+        return False
+
+
+def shared_folders_enabled(config: dict[str, str]) -> bool:
+    return config.get("isolation.tools.hgfs.disable", "true").lower() == "false"
+
+
+def vmx_nics(config: dict[str, str]) -> list[dict]:
+    """Network adapters declared in a parsed .vmx."""
+    nics = []
+    for key in config:
+        m = _ETHERNET.match(key)
+        if not m:
+            continue
+        prefix = f"ethernet{m.group(1)}"
+        connection = config.get(f"{prefix}.connectiontype", "bridged").lower()
+        nics.append({
+            "index": int(m.group(1)),
+            "present": config[key].lower() == "true",
+            "type": connection,
+            "vmnet": (config.get(f"{prefix}.vnet", "") or _CONNECTION_VMNETS.get(connection, "")).lower(),
+            "device": config.get(f"{prefix}.virtualdev", ""),
+            "mac": (config.get(f"{prefix}.address") or config.get(f"{prefix}.generatedaddress", "")).lower(),
+        })
+    return sorted(nics, key=lambda n: n["index"])
+
+
+def vmx_shared_folders(config: dict[str, str]) -> list[dict]:
+    """Shared folders declared in a parsed .vmx."""
+    folders = []
+    for key in config:
+        m = _SHARED_FOLDER.match(key)
+        if not m:
+            continue
+        prefix = f"sharedfolder{m.group(1)}"
+        folders.append({
+            "index": int(m.group(1)),
+            "name": config[key],
+            "host_path": config.get(f"{prefix}.hostpath", ""),
+            "present": config.get(f"{prefix}.present", "false").lower() == "true",
+            "enabled": config.get(f"{prefix}.enabled", "false").lower() == "true",
+            "writable": config.get(f"{prefix}.writeaccess", "false").lower() == "true",
+        })
+    return sorted(folders, key=lambda f: f["index"])
+
+
+def vmx_disks(config: dict[str, str]) -> list[dict]:
+    """Virtual disks (.vmdk files) attached in a parsed .vmx."""
+    disks = []
+    for key, value in config.items():
+        m = _DISK.match(key)
+        if not m or not value.lower().endswith(".vmdk"):
+            continue
+        prefix = key.rsplit(".", 1)[0]
+        if config.get(f"{prefix}.present", "true").lower() != "true":
+            continue
+        disks.append({"bus": m.group(1), "adapter": int(m.group(2)), "device": int(m.group(3)), "file": value})
+    return disks
+
+
+def inventory_path() -> str:
+    """Location of the Workstation VM inventory (the VM library)."""
+    if path := os.getenv("VMWARE_INVENTORY"):
+        return path
+    if os.name == "nt":
+        return os.path.join(os.getenv("APPDATA", ""), "VMware", "inventory.vmls")
+    return os.path.expanduser("~/.vmware/inventory.vmls")
+
+
+def read_inventory() -> list[dict[str, str]]:
+    """VMs listed in the local Workstation inventory as ``{"path", "name"}`` entries."""
+    try:
+        config = read_vmx(inventory_path())
+    except OSError:
+        return []
+    vms = []
+    for key, value in config.items():
+        prefix, _, field = key.partition(".")
+        if prefix.startswith("vmlist") and field == "config" and value.lower().endswith(".vmx"):
+            name = config.get(f"{prefix}.displayname") or os.path.splitext(os.path.basename(value))[0]
+            vms.append({"path": value, "name": name})
+    return vms
+
+
+def resolve_from_inventory(vm_id: str) -> str:
+    """Find a VM in the local inventory by display name or .vmx file name.
+
+    vmrest IDs are not stored in the inventory, so only names can be matched here.
+    """
+    wanted = vm_id.casefold()
+    for vm in read_inventory():
+        stem = os.path.splitext(os.path.basename(vm["path"].replace("\\", "/")))[0]
+        if wanted in (vm["name"].casefold(), stem.casefold()):
+            return vm["path"]
+    return ""
@@ -0,0 +1,173 @@
+"""Background watcher that keeps VM power, tools and IP state warm in memory."""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from .vmrun import VMRun, parse_list
+from .vmx import is_suspended, norm_path
+
+
+@dataclass
+class VMState:
+    path: str
+    power: str = "unknown"
+    tools: str = "unknown"
+    ip: str = ""
+    power_updated: float = 0.0
+    updated: float = 0.0
+    next_due: float = 0.0
+
+    @property
+    def power_staleness(self) -> float:
+        return time.monotonic() - self.power_updated
+
+    @property
+    def staleness(self) -> float:
+        return time.monotonic() - self.updated
+
+
+class StateWatcher:
+    """Periodically refreshes power, tools and IP state of known VMs.
+
+    One ``vmrun list`` per round tells which VMs are running; that list cannot tell a
+    paused VM from a powered-on one, so listed VMs are only known as "running". Unlisted
+    VMs are "suspended" if they have a suspend checkpoint, else "poweredOff"; that check reads
+    the VM's files in a worker thread, and only when a VM stops running or its idle refresh
+    is due. Running VMs get tools state and IP refreshed every ``running_interval`` seconds,
+    powered-off VMs (and VM discovery) only every ``idle_interval`` seconds. At most ``max_procs``
+    vmrun processes run at once, and the loop pauses long enough that refresh work
+    takes no more than ``cpu_budget`` of wall time.
+    """
+
+    def __init__(
+        self,
+        vmrun: VMRun,
+        discover: Callable[[], Awaitable[list[str]]],
+        running_interval: float = 5.0,
+        idle_interval: float = 60.0,
+        max_procs: int = 2,
+        cpu_budget: float = 0.1,
+    ):
+        self.vmrun = vmrun
+        self.discover = discover
+        self.running_interval = running_interval
+        self.idle_interval = idle_interval
+        self.cpu_budget = min(max(cpu_budget, 0.01), 1.0)
+        self._sem = asyncio.Semaphore(max(1, max_procs))
+        self._states: dict[str, VMState] = {}
+        self._next_discover = 0.0
+        self._wake = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, vmrun: VMRun, discover: Callable[[], Awaitable[list[str]]]) -> "StateWatcher":
+        return cls(
+            vmrun,
+            discover,
+            running_interval=float(os.getenv("VMWARE_WATCH_RUNNING_INTERVAL", "5")),
+            idle_interval=float(os.getenv("VMWARE_WATCH_IDLE_INTERVAL", "60")),
+            max_procs=int(os.getenv("VMWARE_WATCH_MAX_PROCS", "2")),
+            cpu_budget=float(os.getenv("VMWARE_WATCH_CPU_BUDGET", "0.1")),
+        )
+
+    def get(self, path: str) -> VMState | None:
+        state = self._states.get(norm_path(path)) if path else None
+        if state is None or not state.updated:
+            return None
+        return state
+
+    def invalidate(self, path: str) -> None:
+        """Force a refresh of ``path`` on the next round, e.g. after a power change."""
+        state = self._states.get(norm_path(path)) if path else None
+        if state is not None:
+            state.updated = 0.0
+            state.next_due = 0.0
+        self._wake.set()
+
+    def _track(self, path: str) -> VMState:
+        key = norm_path(path)
+        if key not in self._states:
+            self._states[key] = VMState(path=path)
+        return self._states[key]
+
+    async def _refresh_vm(self, state: VMState, now: float) -> None:
+        if state.power == "running":
+            async with self._sem:
+                try:
+                    state.tools = await self.vmrun.check_tools_state(state.path)
+                except RuntimeError:
+                    state.tools = "unknown"
+            ip = ""
+            if state.tools == "running":
+                async with self._sem:
+                    try:
+                        ip = await self.vmrun.get_guest_ip(state.path)
+                    except RuntimeError:
+                        ip = ""
+            state.ip = ip
+            state.next_due = now + self.running_interval
+        else:
+            state.tools = "notRunning"
+            state.ip = ""
+            state.next_due = now + self.idle_interval
+        state.updated = time.monotonic()
+
+    async def refresh(self) -> None:
+        """Run one refresh round."""
+        now = time.monotonic()
+        if now >= self._next_discover:
+            try:
+                for path in await self.discover():
+                    self._track(path)
+            except Exception:
+                pass
+            self._next_discover = now + self.idle_interval
+
+        async with self._sem:
+            output = await self.vmrun.list_running()
+        running = set()
+        for path in parse_list(output):
+            running.add(norm_path(path))
+            self._track(path)
+
+        # A VM outside the running set only turns from suspended to off or back by way of
+        # running (or a tool call, which invalidates it), so its .vmx and directory are only
+        # re-read when it has just left the set or its idle refresh is due
+        recheck = {
+            key: state for key, state in self._states.items()
+            if key not in running and (state.power not in ("suspended", "poweredOff") or state.next_due <= now)
+        }
+        suspended = dict(zip(recheck, await asyncio.gather(*(asyncio.to_thread(is_suspended, s.path) for s in recheck.values()))))
+
+        due = []
+        for key, state in self._states.items():
+            if key in running:
+                power = "running"
+            elif key in suspended:
+                power = "suspended" if suspended[key] else "poweredOff"
+            else:
+                power = state.power
+            if power != state.power:
+                state.power = power
+                state.next_due = 0.0
+            state.power_updated = time.monotonic()
+            if state.next_due <= now:
+                due.append(state)
+        await asyncio.gather(*(self._refresh_vm(s, now) for s in due))
+
+    async def run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh()
+            except Exception:
+                pass
+            work = time.monotonic() - started
+            pause = max(work * (1 - self.cpu_budget) / self.cpu_budget, self.running_interval - work, 0.0)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=pause)
+            except asyncio.TimeoutError:
+                pass